@@ -1,5 +1,5 @@
 import sqlite3
-import sqlite3
+import threading
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 from database.models import User, FoodEntry, FoodItem
@@ -15,6 +15,8 @@ class Database:
         import os
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         with sqlite3.connect(self.db_path) as db:
+            # WAL is persistent, so it only needs setting once; readers no longer block the writer
+            db.execute("PRAGMA journal_mode=WAL")
             self._create_tables(db)
             db.commit()
         # Run migrations after table creation
@@ -69,16 +71,34 @@ class Database:
                 FOREIGN KEY (food_entry_id) REFERENCES food_entries (id)
             )
         """)
+        # Nightly summary jobs submitted to the OpenAI Batch API, kept until their summaries are delivered
+        db.execute("""
+            CREATE TABLE IF NOT EXISTS daily_summary_batches (
+                batch_id TEXT PRIMARY KEY,
+                summary_date TEXT NOT NULL,
+                user_ids TEXT NOT NULL,
+                results TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
         db.execute("CREATE INDEX IF NOT EXISTS idx_users_telegram_id ON users (telegram_user_id)")
         db.execute("CREATE INDEX IF NOT EXISTS idx_food_entries_user_id ON food_entries (user_id)")
         db.execute("CREATE INDEX IF NOT EXISTS idx_food_entries_timestamp ON food_entries (timestamp)")
         db.execute("CREATE INDEX IF NOT EXISTS idx_food_items_entry_id ON food_items (food_entry_id)")
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self._connection = None
+        # One connection per thread, reused across calls (DB work runs on the loop thread and in to_thread workers)
+        self._local = threading.local()
 
-    def get_connection(self):
-        return sqlite3.connect(self.db_path)
+    def get_connection(self) -> sqlite3.Connection:
+        """Return this thread's connection; `with` on it commits/rolls back without closing it"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            # Reusing the connection also reuses sqlite3's per-connection prepared statement cache
+            connection = sqlite3.connect(self.db_path)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
 
     def create_or_update_user(self, telegram_user_id: int, username: str = None, first_name: str = None, timezone: str = None, language: str = None) -> int:
         with self.get_connection() as db:
@@ -125,26 +145,19 @@ class Database:
                     )
                 )
                 entry_id = cursor.lastrowid
-                for item in food_items:
-                    db.execute(
-                        """
-                        INSERT INTO food_items 
-                        (food_entry_id, name, quantity, calories, protein, carbs, fat, fiber, sugar, confidence)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (
-                            entry_id,
-                            item.name,
-                            item.quantity,
-                            item.calories,
-                            item.protein,
-                            item.carbs,
-                            item.fat,
-                            item.fiber,
-                            item.sugar,
-                            item.confidence
-                        )
-                    )
+                # One prepared statement for all items, committed together with the entry
+                db.executemany(
+                    """
+                    INSERT INTO food_items 
+                    (food_entry_id, name, quantity, calories, protein, carbs, fat, fiber, sugar, confidence)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    [
+                        (entry_id, item.name, item.quantity, item.calories, item.protein,
+                         item.carbs, item.fat, item.fiber, item.sugar, item.confidence)
+                        for item in food_items
+                    ]
+                )
                 db.commit()
             return True
         except Exception as e:
@@ -239,6 +252,59 @@ class Database:
             logger.error(f"Error getting food entries with items: {e}")
             return []
 
+    def get_food_entries_with_items_by_telegram_id(self, telegram_user_id: int, start_date: str, end_date: str) -> List[Dict]:
+        """Same result as get_food_entries_with_items, resolving the user and loading items in one query"""
+        try:
+            with self.get_connection() as db:
+                cursor = db.execute(
+                    """
+                    SELECT fe.id, fe.timestamp, fe.total_calories, fe.total_protein, fe.total_carbs, fe.total_fat,
+                           fe.total_fiber, fe.total_sugar, fe.meal_count,
+                           fi.id, fi.name, fi.quantity, fi.calories, fi.protein, fi.carbs, fi.fat,
+                           fi.fiber, fi.sugar, fi.confidence
+                    FROM food_entries fe
+                    JOIN users u ON u.id = fe.user_id
+                    LEFT JOIN food_items fi ON fi.food_entry_id = fe.id
+                    WHERE u.telegram_user_id = ? AND DATE(fe.timestamp) BETWEEN ? AND ?
+                    ORDER BY fe.timestamp, fe.id, fi.id
+                    """,
+                    (telegram_user_id, start_date, end_date)
+                )
+                entries = []
+                entry = None
+                for row in cursor.fetchall():
+                    if entry is None or entry['id'] != row[0]:
+                        entry = {
+                            'id': row[0],
+                            'timestamp': row[1],
+                            'total_calories': row[2],
+                            'total_protein': row[3],
+                            'total_carbs': row[4],
+                            'total_fat': row[5],
+                            'total_fiber': row[6],
+                            'total_sugar': row[7],
+                            'meal_count': row[8],
+                            'food_items': []
+                        }
+                        entries.append(entry)
+                    # Entries without items come back once with NULL item columns
+                    if row[9] is not None:
+                        entry['food_items'].append({
+                            'name': row[10],
+                            'quantity': row[11],
+                            'calories': row[12],
+                            'protein': row[13],
+                            'carbs': row[14],
+                            'fat': row[15],
+                            'fiber': row[16],
+                            'sugar': row[17],
+                            'confidence': row[18]
+                        })
+                return entries
+        except Exception as e:
+            logger.error(f"Error getting food entries with items: {e}")
+            return []
+
     def get_all_user_ids(self) -> List[int]:
         try:
             with self.get_connection() as db:
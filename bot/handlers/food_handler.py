@@ -2,6 +2,7 @@ import logging
 import os
 import base64
 from datetime import datetime
+from functools import lru_cache
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import ContextTypes
 from services.ai_service import AIFoodAnalyzer
@@ -14,6 +15,8 @@ ai_analyzer = AIFoodAnalyzer(os.getenv('OPENAI_API_KEY'))
 clarification_service = ClarificationService()
 logger = logging.getLogger(__name__)
 
+# Telegram markup objects are immutable, so one instance per language is built and shared
+@lru_cache(maxsize=4)
 def create_clarification_inline_keyboard(language='en'):
     """Create inline keyboard for clarification requests"""
     if language == 'ru':
@@ -54,6 +57,12 @@ def get_user_language(user_id: int, user_input: str = None) -> str:
             return language_service.detect_language(user_input)
         return 'en'
 
+def invalidate_summary_entries(user_id: int):
+    """Drop the summary service's cached entries for a user who just logged a meal"""
+    # Imported here because summary_handler imports this module
+    from handlers.summary_handler import ai_summary_service
+    ai_summary_service.invalidate_user_entries(user_id)
+
 async def store_and_respond_analysis(update: Update, analysis, user_id: int, is_clarification: bool = False, user_language: str = 'en'):
     """Helper function to store analysis in database and send response to user"""
     try:
@@ -67,6 +76,7 @@ async def store_and_respond_analysis(update: Update, analysis, user_id: int, is_
         stored = database_service.store_food_analysis(user_id, username, first_name, analysis, language=user_language)
         
         if stored:
+            invalidate_summary_entries(user_id)
             # Get localized messages
             messages = language_service.get_messages(user_language)
             
@@ -368,6 +378,7 @@ async def store_and_respond_text_analysis(update: Update, analysis, text_descrip
         stored = database_service.store_food_analysis(user_id, username, first_name, analysis, language=user_language)
 
         if stored:
+            invalidate_summary_entries(user_id)
             # Format response using language service
             response = language_service.format_nutrition_response(
                 user_language, analysis, description=text_description, 
@@ -570,6 +581,7 @@ async def store_and_respond_audio_analysis(update: Update, analysis, transcribed
         stored = database_service.store_food_analysis(user_id, username, first_name, analysis, language=user_language)
 
         if stored:
+            invalidate_summary_entries(user_id)
             # Format response using language service
             response = language_service.format_nutrition_response(
                 user_language, analysis, description=transcribed_text, 
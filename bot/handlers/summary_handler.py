@@ -1,3 +1,4 @@
+import logging
 import os
 import pytz
 from telegram import Update
@@ -7,9 +8,13 @@ from services.database_service import DatabaseService
 from datetime import datetime, timedelta
 from handlers.food_handler import get_user_language
 
+logger = logging.getLogger(__name__)
+
 db_path = os.getenv('DATABASE_PATH', '/app/data/food_journal.db')
+# The summary cache is kept next to the database unless configured otherwise
+summary_cache_path = os.getenv('SUMMARY_CACHE_PATH', os.path.join(os.path.dirname(db_path), 'summary_cache.json'))
 database_service = DatabaseService(db_path)
-ai_summary_service = AISummaryService(os.getenv('OPENAI_API_KEY'), database_service)
+ai_summary_service = AISummaryService(os.getenv('OPENAI_API_KEY'), database_service, cache_file=summary_cache_path)
 
 def get_user_today_date(user_id: int) -> str:
     """Get today's date in the user's timezone, fallback to UTC"""
@@ -35,10 +40,14 @@ async def daily_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
     no_data_message = "📅 No food entries found for today, or unable to generate AI analysis. Start logging your meals! 📸" if user_language == 'en' else "📅 Записи о еде на сегодня не найдены или не удается сгенерировать AI анализ. Начните логировать ваши приемы пищи! 📸"
     error_message = "❌ Unable to generate AI summary right now. Please try again later." if user_language == 'en' else "❌ Не удается сгенерировать AI отчет прямо сейчас. Попробуйте еще раз позже."
     
-    await update.message.reply_text(loading_message)
+    loading = await update.message.reply_text(loading_message)
+    
+    async def show_summary_preview(summary: str):
+        # Replace the loading text with the summary while the rest of the analysis streams in
+        await loading.edit_text(f"📋 {summary}\n\n⏳")
     
     try:
-        ai_summary = await ai_summary_service.generate_daily_summary(user_id, today, user_language)
+        ai_summary = await ai_summary_service.generate_daily_summary(user_id, today, user_language, on_summary=show_summary_preview)
         
         if ai_summary:
             if user_language == 'ru':
@@ -86,13 +95,14 @@ async def daily_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
             
             message += f"🌟 **{ai_summary.motivational_message}**"
             
-            await update.message.reply_text(message, parse_mode='Markdown')
+            # The loading message (possibly showing the streamed preview) becomes the final summary
+            await loading.edit_text(message, parse_mode='Markdown')
         else:
-            await update.message.reply_text(no_data_message)
+            await loading.edit_text(no_data_message)
             
     except Exception as e:
-        print(f"Error generating daily AI summary: {e}")
-        await update.message.reply_text(error_message)
+        logger.exception("Error generating daily AI summary")
+        await loading.edit_text(error_message)
 
 async def weekly_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Provide AI-generated weekly nutrition summary"""
@@ -179,5 +189,5 @@ async def weekly_summary(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await update.message.reply_text(no_data_message)
             
     except Exception as e:
-        print(f"Error generating weekly AI summary: {e}")
+        logger.exception("Error generating weekly AI summary")
         await update.message.reply_text(error_message)
\ No newline at end of file
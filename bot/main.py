@@ -7,18 +7,21 @@ if sys.version_info >= (3, 10):
 # === Imports ===
 import os
 import sys
+import atexit
+import queue
 import logging
+import logging.handlers
 import asyncio
+from functools import lru_cache
 from dotenv import load_dotenv
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackQueryHandler
 from telegram import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
-from handlers.food_handler import handle_food_photo, handle_audio, handle_text_message, cancel_clarification, check_clarification_status, get_user_language
+from handlers.food_handler import handle_food_photo, handle_audio, handle_text_message, cancel_clarification, check_clarification_status, get_user_language, clarification_service
 from handlers.summary_handler import daily_summary, weekly_summary
 from handlers.timezone_handler import set_timezone
 from services.ai_summary_service import AISummaryService
 from services.scheduler_service import AutomatedSummaryService
 from services.database_service import DatabaseService
-from services.clarification_service import ClarificationService
 from services.language_service import language_service
 from database.database import Database
 
@@ -27,18 +30,31 @@ from database.database import Database
 load_dotenv()
 
 # === Logging ===
+# Records are handed to a queue and written by a listener thread, so file and
+# console I/O never blocks the event loop.
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [
+    logging.FileHandler('/app/logs/bot.log'),
+    logging.StreamHandler()
+]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+
+log_queue = queue.SimpleQueue()
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+
 logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO,
-    handlers=[
-        logging.FileHandler('/app/logs/bot.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
 logger = logging.getLogger(__name__)
 
 # === Global Services ===
 
+# Telegram markup objects are immutable, so one instance per language is built and shared
+@lru_cache(maxsize=4)
 def create_commands_keyboard(language='en'):
     """Create a keyboard with essential bot commands"""
     if language == 'ru':
@@ -54,6 +70,7 @@ def create_commands_keyboard(language='en'):
     
     return ReplyKeyboardMarkup(keyboard, resize_keyboard=True, one_time_keyboard=False)
 
+@lru_cache(maxsize=4)
 def create_clarification_inline_keyboard(language='en'):
     """Create inline keyboard for clarification requests"""
     if language == 'ru':
@@ -64,6 +81,22 @@ def create_clarification_inline_keyboard(language='en'):
     return InlineKeyboardMarkup(keyboard)
 
 
+# Keyboard button labels -> commands. Matched on the full label, so food text that merely
+# starts with the same emoji is never mistaken for a button
+BUTTON_TO_COMMAND = {
+    # English buttons
+    '📊 Daily Summary': 'daily',
+    '📈 Weekly Summary': 'weekly', 
+    '❓ Help': 'help',
+    '🌍 Change language': 'change_language',
+    # Russian buttons
+    '📊 Дневная сводка': 'daily',
+    '📈 Недельная сводка': 'weekly',
+    '❓ Помощь': 'help',
+    '🌍 Сменить язык': 'change_language'
+}
+
+
 # === Command Handlers ===
 async def start(update, context):
     """Start command handler"""
@@ -212,24 +245,9 @@ async def handle_keyboard_buttons(update, context):
         
     text = update.message.text.strip()
     
-    # Map button labels to commands
-    button_to_command = {
-        # English buttons
-        '📊 Daily Summary': 'daily',
-        '📈 Weekly Summary': 'weekly', 
-        '❓ Help': 'help',
-        '🌍 Change language': 'change_language',
-        # Russian buttons
-        '📊 Дневная сводка': 'daily',
-        '📈 Недельная сводка': 'weekly',
-        '❓ Помощь': 'help',
-        '🌍 Сменить язык': 'change_language'
-    }
-    
     # Check if this is a keyboard button
-    if text in button_to_command:
-        command = button_to_command[text]
-        
+    command = BUTTON_TO_COMMAND.get(text)
+    if command:
         # Route to appropriate handler without modifying the update object
         if command == 'daily':
             await daily_summary(update, context)
@@ -259,8 +277,7 @@ async def handle_callback_query(update, context):
         user_id = update.effective_user.id
         user_language = get_user_language(user_id)
         
-        # Cancel the clarification using the service directly
-        clarification_service = ClarificationService()
+        # Cancel the clarification using the shared service so its pending saves stay consistent
         if clarification_service.has_pending_clarification(user_id):
             clarification_service.clear_pending_clarification(user_id)
             logger.info(f"User {user_id} cancelled pending clarification via inline button.")
@@ -289,10 +306,12 @@ def init_database():
     db = Database(db_path)
     db.initialize()
 
+# Expiry is tracked in a min-heap, so a sweep only touches expired entries and can run often
+CLARIFICATION_CLEANUP_INTERVAL_SECONDS = 15 * 60
+
 async def cleanup_expired_clarifications(context):
     """Periodic cleanup of expired clarifications - job queue callback"""
     try:
-        clarification_service = ClarificationService()
         clarification_service.cleanup_expired_clarifications(max_age_hours=24)
         logger.info("Completed clarification cleanup")
     except Exception as e:
@@ -319,9 +338,9 @@ if __name__ == "__main__":
     application.add_handler(MessageHandler(filters.VOICE | filters.AUDIO, handle_audio))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_text_wrapper))
 
-    # Schedule cleanup job to run every hour
+    # Schedule periodic cleanup of expired clarifications
     job_queue = application.job_queue
-    job_queue.run_repeating(cleanup_expired_clarifications, interval=3600, first=60)
+    job_queue.run_repeating(cleanup_expired_clarifications, interval=CLARIFICATION_CLEANUP_INTERVAL_SECONDS, first=60)
 
     # Start polling (blocking call)
     logger.info('Bot started. Listening for messages...')
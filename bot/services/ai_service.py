@@ -1,10 +1,14 @@
+import asyncio
 import base64
+import io
+import logging
 from openai import OpenAI
 from typing import Optional, List, Tuple
-from models.nutrition_models import FoodAnalysisResponse, UncertaintyInfo
+from models.nutrition_models import FoodAnalysisResponse, FoodItem, NutritionInfo, UncertaintyInfo
 from datetime import datetime
 from pydantic import BaseModel
-import io
+
+logger = logging.getLogger(__name__)
 
 # Pydantic models for structured output
 class NutritionData(BaseModel):
@@ -29,6 +33,69 @@ class NutritionParseResponse(BaseModel):
     total_nutrition: NutritionData
     uncertainty: UncertaintyData
 
+# A clarified NutritionParseResponse is typically well under 400 tokens even with
+# several food items; cap decoding a little above that instead of the old 1024.
+_CLARIFICATION_MAX_COMPLETION_TOKENS = 512
+
+# Labels for the clarification user prompts, looked up once per request by language
+_CLARIFICATION_LABELS = {
+    'ru': {
+        'original': 'Исходный анализ',
+        'clarification': 'Уточнения пользователя',
+        'photo_instruction': 'Пожалуйста, проанализируйте это изображение уточнения и предоставьте структурированные данные о питательности:',
+        'audio_instruction': 'Предоставьте финальный структурированный анализ питательности, объединяющий эту информацию.'
+    },
+    'en': {
+        'original': 'Original Analysis',
+        'clarification': 'User Clarification',
+        'photo_instruction': 'Please analyze this clarification image and provide structured nutritional data:',
+        'audio_instruction': 'Provide final structured nutritional analysis combining this information.'
+    }
+}
+
+# Static clarification prompts, hoisted so the system prefix is identical across requests
+_CLARIFICATION_PHOTO_SYSTEM_PROMPT_RU = """Вы помогаете уточнить предыдущий анализ еды.
+                
+Проанализируйте это изображение уточнения и предоставьте структурированные данные о питательности, которые решают неопределённости из исходного анализа.
+
+Правила:
+- Сосредоточьтесь на определении конкретных продуктов и количеств, видимых на изображении
+- Предоставьте структурированный вывод с продуктами и данными о питательности
+- Установите has_uncertainty в false, поскольку это уточнение
+- Установите confidence_score в 0.9 или выше
+- ВАЖНО: Называйте все продукты НА РУССКОМ ЯЗЫКЕ (например, "Груша", "Молоко", "Хлеб")"""
+
+_CLARIFICATION_PHOTO_SYSTEM_PROMPT_EN = """You are helping to clarify a previous food analysis. 
+                
+Analyze this clarification image and provide structured nutritional data that resolves uncertainties from the original analysis.
+
+Rules:
+- Focus on identifying specific foods and quantities visible in the image
+- Provide structured output with food items and nutrition data
+- Set has_uncertainty to false since this is clarification
+- Set confidence_score to 0.9 or higher"""
+
+_CLARIFICATION_AUDIO_SYSTEM_PROMPT_RU = """Вы помощник диетолога, который предоставляет структурированные данные о питательности.
+
+У вас есть исходный анализ еды и уточнения от пользователя. Предоставьте финальный структурированный анализ питательности.
+
+Правила:
+- Объедините исходный анализ с уточнениями пользователя
+- Решите любые неопределённости, используя уточнения
+- Установите has_uncertainty в false, поскольку это уточнение
+- Установите confidence_score в 0.9 или выше
+- ВАЖНО: Называйте все продукты НА РУССКОМ ЯЗЫКЕ (например, "Груша", "Молоко", "Хлеб")"""
+
+_CLARIFICATION_AUDIO_SYSTEM_PROMPT_EN = """You are a Nutritionist's assistant that provides structured nutritional data.
+
+You have an original food analysis and clarification from the user. Provide final structured nutritional analysis.
+
+Rules:
+- Combine original analysis with user clarification
+- Resolve any uncertainties using the clarification
+- Set has_uncertainty to false since this is clarification
+- Set confidence_score to 0.9 or higher"""
+
 class AIFoodAnalyzer:
     def __init__(self, api_key: str):
         self.client = OpenAI(api_key=api_key)
@@ -119,7 +186,6 @@ Analyze the food image and extract nutritional information directly into the str
                 user_message = "Analyze this food image and provide structured nutritional information."
         
         try:
-            import asyncio
             response = await asyncio.to_thread(
                 self.client.beta.chat.completions.parse,
                 model="gpt-5-mini",
@@ -147,34 +213,32 @@ Analyze the food image and extract nutritional information directly into the str
             )
             
             if not response.choices or not response.choices[0].message:
-                print("No valid response from OpenAI.")
+                logger.warning("No valid response from OpenAI.")
                 return None
                 
             parsed_data = response.choices[0].message.parsed
             if not parsed_data:
-                print("No parsed data from structured response")
+                logger.warning("No parsed data from structured response")
                 return None
                 
-            print(f"Successfully analyzed image with {len(parsed_data.food_items)} food items")
-            print(f"Uncertainty detected: {parsed_data.uncertainty.has_uncertainty}")
+            logger.info(f"Successfully analyzed image with {len(parsed_data.food_items)} food items")
+            logger.info(f"Uncertainty detected: {parsed_data.uncertainty.has_uncertainty}")
             
             # Convert to your existing models
             return self._convert_to_food_analysis_response(parsed_data)
             
         except Exception as e:
-            print(f"Error analyzing food image: {e}")
+            logger.exception("Error analyzing food image")
             return None
 
     async def analyze_food_audio(self, audio_bytes: bytes, filename: str = "audio.ogg", clarification_text: str = None, user_language: str = 'en') -> Optional[Tuple[FoodAnalysisResponse, str]]:
         """Analyze food audio by transcribing and then analyzing the description in a single step"""
         try:
-            import asyncio
-            
             # Create BytesIO object for OpenAI API
             audio_bytes_io = io.BytesIO(audio_bytes)
             audio_bytes_io.name = filename
             
-            print(f"Starting audio transcription for file: {filename}")
+            logger.info(f"Starting audio transcription for file: {filename}")
             
             # Step 1: Transcribe audio using Whisper with language detection
             transcription = await asyncio.to_thread(
@@ -185,10 +249,10 @@ Analyze the food image and extract nutritional information directly into the str
             )
             
             transcribed_text = transcription.text
-            print(f"Transcription completed: {transcribed_text[:100]}...")
+            logger.info(f"Transcription completed: {transcribed_text[:100]}...")
             
             if not transcribed_text.strip():
-                print("Empty transcription received.")
+                logger.warning("Empty transcription received.")
                 return None
             
             # Step 2: Single-step analysis with structured output
@@ -270,7 +334,7 @@ Analyze the food description and extract nutritional information directly into t
                     
                     user_message = f"Analyze this food description and provide structured nutritional information: {transcribed_text}"
             
-            print("Starting single-step food analysis from transcription...")
+            logger.info("Starting single-step food analysis from transcription...")
             
             response = await asyncio.to_thread(
                 self.client.beta.chat.completions.parse,
@@ -284,37 +348,35 @@ Analyze the food description and extract nutritional information directly into t
                 max_completion_tokens=2048
             )
             
-            print(f"OpenAI structured response: {response}")
+            logger.debug(f"OpenAI structured response: {response}")
             
             if not response.choices or not response.choices[0].message:
-                print("No valid response from OpenAI for food analysis.")
+                logger.warning("No valid response from OpenAI for food analysis.")
                 return None
                 
             parsed_data = response.choices[0].message.parsed
             if not parsed_data:
-                print("No parsed data from structured response")
+                logger.warning("No parsed data from structured response")
                 return None
                 
-            print(f"Successfully analyzed audio with {len(parsed_data.food_items)} food items")
-            print(f"Uncertainty detected: {parsed_data.uncertainty.has_uncertainty}")
+            logger.info(f"Successfully analyzed audio with {len(parsed_data.food_items)} food items")
+            logger.info(f"Uncertainty detected: {parsed_data.uncertainty.has_uncertainty}")
             
             # Convert to your existing models and return with transcribed text
             analysis = self._convert_to_food_analysis_response(parsed_data)
             if analysis:
                 return (analysis, transcribed_text)
             else:
-                print("Failed to convert parsed data to analysis response.")
+                logger.warning("Failed to convert parsed data to analysis response.")
                 return None
                 
         except Exception as e:
-            print(f"Error analyzing food audio: {e}")
+            logger.exception("Error analyzing food audio")
             return None
 
     async def analyze_food_text(self, text_description: str, clarification_text: str = None, user_language: str = 'en') -> Optional[FoodAnalysisResponse]:
         """Analyze food from text description using single-step structured output"""
         try:
-            import asyncio
-            
             if user_language == 'ru':
                 base_rules = """Правила:
 - Определите все упомянутые продукты и их питательную информацию
@@ -393,7 +455,7 @@ Analyze the food description and extract nutritional information directly into t
                     
                     user_message = f"Analyze this food description and provide structured nutritional information: {text_description}"
             
-            print("Starting single-step food analysis from text description...")
+            logger.info("Starting single-step food analysis from text description...")
             
             response = await asyncio.to_thread(
                 self.client.beta.chat.completions.parse,
@@ -408,28 +470,26 @@ Analyze the food description and extract nutritional information directly into t
             )
             
             if not response.choices or not response.choices[0].message:
-                print("No valid response from OpenAI for text analysis.")
+                logger.warning("No valid response from OpenAI for text analysis.")
                 return None
                 
             parsed_data = response.choices[0].message.parsed
             if not parsed_data:
-                print("No parsed data from structured response")
+                logger.warning("No parsed data from structured response")
                 return None
                 
-            print(f"Successfully analyzed text with {len(parsed_data.food_items)} food items")
-            print(f"Uncertainty detected: {parsed_data.uncertainty.has_uncertainty}")
+            logger.info(f"Successfully analyzed text with {len(parsed_data.food_items)} food items")
+            logger.info(f"Uncertainty detected: {parsed_data.uncertainty.has_uncertainty}")
             
             # Convert to your existing models
             return self._convert_to_food_analysis_response(parsed_data)
             
         except Exception as e:
-            print(f"Error analyzing food text: {e}")
+            logger.exception("Error analyzing food text")
             return None
 
     def _convert_to_food_analysis_response(self, parsed_data: NutritionParseResponse) -> FoodAnalysisResponse:
         """Convert parsed nutrition data to FoodAnalysisResponse"""
-        from models.nutrition_models import FoodItem, NutritionInfo
-        
         # Convert to your existing models
         food_items = []
         for item_data in parsed_data.food_items:
@@ -488,34 +548,14 @@ Analyze the food description and extract nutritional information directly into t
         """
         try:
             clarification_text = ""
+            labels = _CLARIFICATION_LABELS.get(user_language, _CLARIFICATION_LABELS['en'])
             
             if clarification_type == 'photo':
                 # Get clarification from image using structured approach
                 encoded_image = self.encode_image(clarification_data)
                 
-                if user_language == 'ru':
-                    system_prompt = """Вы помогаете уточнить предыдущий анализ еды.
-                
-Проанализируйте это изображение уточнения и предоставьте структурированные данные о питательности, которые решают неопределённости из исходного анализа.
-
-Правила:
-- Сосредоточьтесь на определении конкретных продуктов и количеств, видимых на изображении
-- Предоставьте структурированный вывод с продуктами и данными о питательности
-- Установите has_uncertainty в false, поскольку это уточнение
-- Установите confidence_score в 0.9 или выше
-- ВАЖНО: Называйте все продукты НА РУССКОМ ЯЗЫКЕ (например, "Груша", "Молоко", "Хлеб")"""
-                else:
-                    system_prompt = """You are helping to clarify a previous food analysis. 
-                
-Analyze this clarification image and provide structured nutritional data that resolves uncertainties from the original analysis.
-
-Rules:
-- Focus on identifying specific foods and quantities visible in the image
-- Provide structured output with food items and nutrition data
-- Set has_uncertainty to false since this is clarification
-- Set confidence_score to 0.9 or higher"""
+                system_prompt = _CLARIFICATION_PHOTO_SYSTEM_PROMPT_RU if user_language == 'ru' else _CLARIFICATION_PHOTO_SYSTEM_PROMPT_EN
                 
-                import asyncio
                 response = await asyncio.to_thread(
                     self.client.beta.chat.completions.parse,
                     model="gpt-5-mini",
@@ -527,7 +567,7 @@ Rules:
                             "content": [
                                 {
                                     "type": "text",
-                                    "text": f"{'Исходный анализ' if user_language == 'ru' else 'Original analysis'}: {original_analysis_text}\n\n{'Пожалуйста, проанализируйте это изображение уточнения и предоставьте структурированные данные о питательности:' if user_language == 'ru' else 'Please analyze this clarification image and provide structured nutritional data:'}"
+                                    "text": f"{labels['original']}: {original_analysis_text}\n\n{labels['photo_instruction']}"
                                 },
                                 {
                                     "type": "image_url",
@@ -539,7 +579,7 @@ Rules:
                         }
                     ],
                     response_format=NutritionParseResponse,
-                    max_completion_tokens=1024
+                    max_completion_tokens=_CLARIFICATION_MAX_COMPLETION_TOKENS
                 )
                 
                 if response.choices and response.choices[0].message:
@@ -549,9 +589,6 @@ Rules:
                 
             elif clarification_type == 'audio':
                 # Transcribe clarification audio then analyze with structured output
-                import asyncio
-                import io
-                
                 audio_bytes_io = io.BytesIO(clarification_data)
                 audio_bytes_io.name = filename or "clarification.ogg"
                 
@@ -566,36 +603,16 @@ Rules:
                 
                 if clarification_text.strip():
                     # Single-step structured analysis with clarification
-                    if user_language == 'ru':
-                        system_prompt = """Вы помощник диетолога, который предоставляет структурированные данные о питательности.
-
-У вас есть исходный анализ еды и уточнения от пользователя. Предоставьте финальный структурированный анализ питательности.
-
-Правила:
-- Объедините исходный анализ с уточнениями пользователя
-- Решите любые неопределённости, используя уточнения
-- Установите has_uncertainty в false, поскольку это уточнение
-- Установите confidence_score в 0.9 или выше
-- ВАЖНО: Называйте все продукты НА РУССКОМ ЯЗЫКЕ (например, "Груша", "Молоко", "Хлеб")"""
-                    else:
-                        system_prompt = """You are a Nutritionist's assistant that provides structured nutritional data.
-
-You have an original food analysis and clarification from the user. Provide final structured nutritional analysis.
-
-Rules:
-- Combine original analysis with user clarification
-- Resolve any uncertainties using the clarification
-- Set has_uncertainty to false since this is clarification
-- Set confidence_score to 0.9 or higher"""
+                    system_prompt = _CLARIFICATION_AUDIO_SYSTEM_PROMPT_RU if user_language == 'ru' else _CLARIFICATION_AUDIO_SYSTEM_PROMPT_EN
                     
                     combined_prompt = f"""
-{'Исходный анализ' if user_language == 'ru' else 'Original Analysis'}:
+{labels['original']}:
 {original_analysis_text}
 
-{'Уточнения пользователя' if user_language == 'ru' else 'User Clarification'}:
+{labels['clarification']}:
 {clarification_text}
 
-{'Предоставьте финальный структурированный анализ питательности, объединяющий эту информацию.' if user_language == 'ru' else 'Provide final structured nutritional analysis combining this information.'}
+{labels['audio_instruction']}
 """
                     
                     response = await asyncio.to_thread(
@@ -607,7 +624,7 @@ Rules:
                             {"role": "user", "content": combined_prompt}
                         ],
                         response_format=NutritionParseResponse,
-                        max_completion_tokens=1024
+                        max_completion_tokens=_CLARIFICATION_MAX_COMPLETION_TOKENS
                     )
                     
                     if response.choices and response.choices[0].message:
@@ -615,9 +632,9 @@ Rules:
                         if parsed_data:
                             return self._convert_to_food_analysis_response(parsed_data)
             
-            print("Failed to obtain valid clarification analysis")
+            logger.warning("Failed to obtain valid clarification analysis")
             return None
                 
         except Exception as e:
-            print(f"Error in analyze_with_clarification: {e}")
+            logger.exception("Error in analyze_with_clarification")
             return None
\ No newline at end of file
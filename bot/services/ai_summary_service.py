@@ -1,34 +1,25 @@
-from openai import OpenAI
-from typing import List, Dict, Optional
-from datetime import datetime, timedelta
-from pydantic import BaseModel
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from typing import Awaitable, Callable, List, Dict, Optional, Tuple
+from datetime import date, timedelta
+from pydantic import BaseModel, ValidationError
 from services.database_service import DatabaseService
 
-class DailyInsight(BaseModel):
-    summary: str
-    key_observations: List[str]
-    nutrition_highlights: List[str]
-    recommendations: List[str]
-    motivational_message: str
+logger = logging.getLogger(__name__)
 
-class WeeklyInsight(BaseModel):
-    summary: str
-    trends_analysis: List[str]
-    nutrition_patterns: List[str]
-    achievements: List[str]
-    areas_for_improvement: List[str]
-    personalized_recommendations: List[str]
-    next_week_goals: List[str]
+# Part of every summary cache key; bump when the prompts or insight models change
+_SUMMARY_PROMPT_VERSION = "v1"
 
-class AISummaryService:
-    def __init__(self, openai_api_key: str, database_service: DatabaseService):
-        self.client = OpenAI(api_key=openai_api_key)
-        self.database_service = database_service
-    
-    def _get_daily_system_prompt(self, language: str) -> str:
-        """Get system prompt for daily summary in specified language"""
-        if language == 'ru':
-            return """Ты профессиональный диетолог и консультант по здоровому питанию. Проанализируй дневные данные о питании пользователя и предоставь персонализированные рекомендации.
+# System prompts are kept as module-level constants so the static prefix sent to
+# OpenAI is byte-identical across calls, which lets provider-side prompt caching kick in.
+_DAILY_SYSTEM_PROMPT_RU = """Ты профессиональный диетолог и консультант по здоровому питанию. Проанализируй дневные данные о питании пользователя и предоставь персонализированные рекомендации.
 
 Сосредоточься на:
 1. Общем балансе питания и качестве
@@ -55,8 +46,8 @@ class AISummaryService:
   "recommendations": ["короткая рекомендация 1", "короткая рекомендация 2"],
   "motivational_message": "Короткое ободряющее сообщение"
 }"""
-        else:  # Default to English
-            return """You are a professional nutritionist and health coach. Analyze the user's daily nutrition data and provide personalized insights.
+
+_DAILY_SYSTEM_PROMPT_EN = """You are a professional nutritionist and health coach. Analyze the user's daily nutrition data and provide personalized insights.
 
 Focus on:
 1. Overall nutritional balance and quality
@@ -83,11 +74,8 @@ Please respond with a JSON object containing:
   "recommendations": ["short recommendation 1", "short recommendation 2"],
   "motivational_message": "Short encouraging message"
 }"""
-    
-    def _get_weekly_system_prompt(self, language: str) -> str:
-        """Get system prompt for weekly summary in specified language"""
-        if language == 'ru':
-            return """Ты эксперт-диетолог, анализирующий недельные паттерны питания. Предоставь комплексные insights о:
+
+_WEEKLY_SYSTEM_PROMPT_RU = """Ты эксперт-диетолог, анализирующий недельные паттерны питания. Предоставь комплексные insights о:
 
 1. Недельных трендах и паттернах питания
 2. Последовательности в привычках питания
@@ -114,8 +102,8 @@ Please respond with a JSON object containing:
   "personalized_recommendations": ["короткая рек. 1", "короткая рек. 2"],
   "next_week_goals": ["короткая цель 1", "короткая цель 2"]
 }"""
-        else:  # Default to English
-            return """You are an expert nutritionist analyzing a week of eating patterns. Provide comprehensive insights about:
+
+_WEEKLY_SYSTEM_PROMPT_EN = """You are an expert nutritionist analyzing a week of eating patterns. Provide comprehensive insights about:
 
 1. Weekly nutrition trends and patterns
 2. Consistency in eating habits
@@ -142,57 +130,172 @@ Please respond with a JSON object containing:
   "personalized_recommendations": ["short rec 1", "short rec 2"],
   "next_week_goals": ["short goal 1", "short goal 2"]
 }"""
+
+_DAILY_SYSTEM_PROMPTS = {'en': _DAILY_SYSTEM_PROMPT_EN, 'ru': _DAILY_SYSTEM_PROMPT_RU}
+_WEEKLY_SYSTEM_PROMPTS = {'en': _WEEKLY_SYSTEM_PROMPT_EN, 'ru': _WEEKLY_SYSTEM_PROMPT_RU}
+
+# Static user-prompt instructions, placed before the per-user data
+_DAILY_USER_INSTRUCTIONS = {
+    'en': "Analyze today's nutrition data and provide insights:\n"
+          "Please provide a CONCISE daily summary. Keep all responses short and focused - aim for 1-2 sentences per section maximum.",
+    'ru': "Проанализируй сегодняшние данные о питании и предоставь insights:\n"
+          "Предоставь КРАТКИЙ дневной отчет. Держи все ответы короткими и сфокусированными - стремись к максимум 1-2 предложениям на секцию."
+}
+
+_WEEKLY_USER_INSTRUCTIONS = {
+    'en': "Analyze this week's nutrition data and provide insights:\n"
+          "Please provide a CONCISE weekly analysis. Keep all responses short and focused - aim for 1-2 sentences per bullet point maximum.",
+    'ru': "Проанализируй данные о питании за эту неделю и предоставь insights:\n"
+          "Предоставь КРАТКИЙ недельный анализ. Держи все ответы короткими и сфокусированными - стремись к максимум 1-2 предложениям на пункт."
+}
+
+# Bound format methods for the repeated per-meal/per-day/per-item prompt lines, built once
+_MEAL_HEADER_LINE = "\nMeal {} ({}):\n".format
+_MEAL_TOTALS_LINE = "  Total: {:.0f} kcal, {:.1f}g protein, {:.1f}g carbs, {:.1f}g fat\n".format
+_FOOD_ITEM_LINE = "    - {} ({}): {:.0f} kcal\n".format
+_REPEATED_FOOD_ITEM_LINE = "    - {} ×{} ({} each): {:.0f} kcal each\n".format
+_WEEKLY_DAY_LINE = "\n{}: {:.0f} kcal, {:.1f}g protein, {:.1f}g carbs, {:.1f}g fat ({} meals)\n".format
+
+_JSON_DECODER = json.JSONDecoder()
+
+def _extract_completed_string_field(buffer: str, field: str) -> Optional[str]:
+    """Return a top-level string field from partial JSON once its closing quote has streamed in"""
+    marker = buffer.find(f'"{field}"')
+    if marker == -1:
+        return None
+    colon = buffer.find(':', marker + len(field) + 2)
+    if colon == -1:
+        return None
+    start = colon + 1
+    while start < len(buffer) and buffer[start].isspace():
+        start += 1
+    try:
+        value, _ = _JSON_DECODER.raw_decode(buffer, start)
+    except json.JSONDecodeError:
+        return None
+    return value if isinstance(value, str) else None
+
+class DailyInsight(BaseModel):
+    summary: str
+    key_observations: List[str]
+    nutrition_highlights: List[str]
+    recommendations: List[str]
+    motivational_message: str
+
+class WeeklyInsight(BaseModel):
+    summary: str
+    trends_analysis: List[str]
+    nutrition_patterns: List[str]
+    achievements: List[str]
+    areas_for_improvement: List[str]
+    personalized_recommendations: List[str]
+    next_week_goals: List[str]
+
+def _strict_response_format(model) -> Dict:
+    """Build a strict json_schema response_format for a flat insight model"""
+    schema = model.model_json_schema()
+    schema["additionalProperties"] = False
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": model.__name__, "schema": schema, "strict": True}
+    }
+
+# Schemas are computed once; responses are parsed and checked against the model in a
+# single model_validate_json pass (pydantic-core), with no intermediate dict
+_DAILY_RESPONSE_FORMAT = _strict_response_format(DailyInsight)
+_WEEKLY_RESPONSE_FORMAT = _strict_response_format(WeeklyInsight)
+
+class AISummaryService:
+    # Maximum concurrent per-user OpenAI calls when generating summaries in bulk
+    BULK_CONCURRENCY = 16
+    # Weeks with fewer logged meals than this don't get an AI weekly analysis
+    MIN_WEEK_ENTRIES = 3
+    # ...or that were logged on fewer distinct days than this (no trend to analyze)
+    MIN_WEEK_DAYS = 2
+    # Output caps sized to the concise DailyInsight/WeeklyInsight JSON (with headroom for Russian)
+    DAILY_MAX_COMPLETION_TOKENS = 768
+    WEEKLY_MAX_COMPLETION_TOKENS = 1024
+    # Summaries are cached by a hash of the exact prompt data, so unchanged days/weeks skip the AI call
+    SUMMARY_CACHE_SIZE = 512
+    SUMMARY_CACHE_TTL_SECONDS = 6 * 60 * 60
+    # Cache inserts within this window share one write of the cache file
+    SUMMARY_CACHE_SAVE_DELAY_SECONDS = 5
+    # Entry range lookups are reused briefly, so a daily + weekly run for one user shares its queries
+    ENTRY_RANGE_CACHE_SIZE = 1024
+    ENTRY_RANGE_CACHE_TTL_SECONDS = 30
+
+    def __init__(self, openai_api_key: str, database_service: DatabaseService,
+                 cache_file: Optional[str] = None,
+                 request_timeout: float = 20.0, max_retries: int = 3):
+        self.client = AsyncOpenAI(api_key=openai_api_key)
+        self.database_service = database_service
+        # Per-attempt timeout and retry budget for summary requests
+        self.request_timeout = request_timeout
+        self.max_retries = max_retries
+        # File the summary cache is persisted to; None keeps it in memory only
+        self.cache_file = cache_file
+        # content hash -> (cached_at, insight fields)
+        self._summary_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._summary_cache_dirty = False
+        self._summary_cache_save_task: Optional[asyncio.Task] = None
+        self._load_summary_cache()
+        # (telegram_user_id, start, end) -> (fetched_at, entries)
+        self._entry_range_cache: Dict[Tuple[int, str, str], Tuple[float, Tuple[Dict, ...]]] = {}
+        # Lookups run in to_thread workers, so reads, inserts and evictions take this lock
+        self._entry_range_lock = threading.Lock()
+    
+    def _get_daily_system_prompt(self, language: str) -> str:
+        """Get system prompt for daily summary in specified language"""
+        return _DAILY_SYSTEM_PROMPTS.get(language, _DAILY_SYSTEM_PROMPT_EN)
+    
+    def _get_weekly_system_prompt(self, language: str) -> str:
+        """Get system prompt for weekly summary in specified language"""
+        return _WEEKLY_SYSTEM_PROMPTS.get(language, _WEEKLY_SYSTEM_PROMPT_EN)
     
-    async def generate_daily_summary(self, telegram_user_id: int, date_str: str, language: str = 'en') -> Optional[DailyInsight]:
-        """Generate AI-powered daily nutrition summary"""
+    async def generate_daily_summary(self, telegram_user_id: int, date_str: str, language: str = 'en',
+                                     on_summary: Optional[Callable[[str], Awaitable[None]]] = None) -> Optional[DailyInsight]:
+        """Generate AI-powered daily nutrition summary.
+
+        If on_summary is given, the response is streamed and on_summary is awaited with the
+        summary text as soon as it is complete, before the remaining fields arrive.
+        """
         try:
-            # Get user's food data for the day
-            daily_entries = self._get_daily_nutrition_data(telegram_user_id, date_str)
+            # Database access is synchronous; keep it off the event loop
+            daily_entries = await asyncio.to_thread(self._get_daily_nutrition_data, telegram_user_id, date_str)
             
             if not daily_entries:
                 return None
             
-            # Get recent context (last 7 days for comparison)
-            context_data = self._get_recent_context(telegram_user_id, date_str, days=7)
-            
-            # Prepare data for AI analysis
-            nutrition_data = self._format_daily_data_for_ai(daily_entries, context_data, date_str)
+            # Nothing with nutritional value was logged (e.g. only water); the totals-only summary says it all
+            if not any(entry.get('total_calories') or entry.get('total_protein') or entry.get('total_carbs') or entry.get('total_fat')
+                       for entry in daily_entries):
+                return self._no_intake_daily_insight(daily_entries, language)
             
-            system_prompt = self._get_daily_system_prompt(language)
-
-            user_prompt_text = "Analyze today's nutrition data and provide insights:" if language == 'en' else "Проанализируй сегодняшние данные о питании и предоставь insights:"
-            concise_instruction = "Please provide a CONCISE daily summary. Keep all responses short and focused - aim for 1-2 sentences per section maximum." if language == 'en' else "Предоставь КРАТКИЙ дневной отчет. Держи все ответы короткими и сфокусированными - стремись к максимум 1-2 предложениям на секцию."
+            nutrition_data = await asyncio.to_thread(self._build_daily_nutrition_data, telegram_user_id, date_str, daily_entries)
             
-            user_prompt = f"""{user_prompt_text}
-
-{nutrition_data}
-
-{concise_instruction}"""
+            # Any change to the day's entries or context changes the key, so stale insights are never served
+            cache_key = self._summary_cache_key('daily', language, nutrition_data)
+            cached_insight = self._get_cached_summary(cache_key, DailyInsight)
+            if cached_insight:
+                return cached_insight
 
-            response = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                model="gpt-5-mini",
-                max_completion_tokens=2048,
-                reasoning_effort="minimal"
-            )
+            request_body = self._build_daily_request_body(nutrition_data, language)
+            try:
+                if on_summary:
+                    content = await self._stream_daily_completion(request_body, on_summary)
+                else:
+                    response = await self._create_chat_completion(**request_body)
+                    content = response.choices[0].message.content
+            except RateLimitError:
+                logger.warning("Rate limited while generating daily AI summary, using totals-only summary")
+                return self._fallback_daily_insight(daily_entries, language)
             
-            if response.choices[0].message.content:
-                # Parse the response manually since we're not using structured output
-                content = response.choices[0].message.content
+            if content:
                 try:
-                    import json
-                    parsed_data = json.loads(content)
-                    return DailyInsight(
-                        summary=parsed_data.get('summary', ''),
-                        key_observations=parsed_data.get('key_observations', []),
-                        nutrition_highlights=parsed_data.get('nutrition_highlights', []),
-                        recommendations=parsed_data.get('recommendations', []),
-                        motivational_message=parsed_data.get('motivational_message', '')
-                    )
-                except (json.JSONDecodeError, KeyError):
+                    insight = DailyInsight.model_validate_json(content)
+                    self._cache_summary(cache_key, insight)
+                    return insight
+                except ValidationError:
                     # Fallback: create a simple summary from the content
                     return DailyInsight(
                         summary=content,
@@ -204,70 +307,399 @@ Please respond with a JSON object containing:
             return None
             
         except Exception as e:
-            print(f"Error generating daily AI summary: {e}")
+            logger.exception("Error generating daily AI summary")
             return None
-    
+
+    async def _create_chat_completion(self, **params):
+        """Create a chat completion with a per-attempt timeout, retrying transient errors with backoff"""
+        client = self.client.with_options(timeout=self.request_timeout, max_retries=0)
+        
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                response = await client.chat.completions.create(**params)
+                # completion_tokens is logged so the *_MAX_COMPLETION_TOKENS caps can be tuned from real output lengths
+                completion_tokens = response.usage.completion_tokens if response.usage else None
+                logger.info(f"OpenAI request ok: attempt={attempt + 1} latency_ms={(time.perf_counter() - started) * 1000:.0f} completion_tokens={completion_tokens}")
+                return response
+            except (APITimeoutError, APIConnectionError, InternalServerError, RateLimitError) as e:
+                logger.warning(f"OpenAI request failed: attempt={attempt + 1} error={type(e).__name__} latency_ms={(time.perf_counter() - started) * 1000:.0f}")
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(0.5 * 2 ** attempt)
+
+    async def _stream_daily_completion(self, request_body: Dict, on_summary: Callable[[str], Awaitable[None]]) -> Optional[str]:
+        """Stream a daily summary completion, handing the summary field to on_summary once it closes.
+
+        Falls back to the retrying non-streaming request if the stream can't be opened.
+        """
+        client = self.client.with_options(timeout=self.request_timeout, max_retries=0)
+        started = time.perf_counter()
+        try:
+            stream = await client.chat.completions.create(**request_body, stream=True, stream_options={"include_usage": True})
+        except (APITimeoutError, APIConnectionError, InternalServerError) as e:
+            logger.warning(f"OpenAI stream failed to open: error={type(e).__name__}, retrying without streaming")
+            response = await self._create_chat_completion(**request_body)
+            content = response.choices[0].message.content
+            if content:
+                summary = _extract_completed_string_field(content, 'summary')
+                if summary:
+                    await self._notify_summary(on_summary, summary)
+            return content
+
+        parts = []
+        summary_sent = False
+        completion_tokens = None
+        async for chunk in stream:
+            # The final chunk carries usage and no choices
+            if chunk.usage:
+                completion_tokens = chunk.usage.completion_tokens
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            parts.append(chunk.choices[0].delta.content)
+            if not summary_sent:
+                summary = _extract_completed_string_field("".join(parts), 'summary')
+                if summary:
+                    summary_sent = True
+                    logger.info(f"OpenAI stream summary ready: latency_ms={(time.perf_counter() - started) * 1000:.0f}")
+                    await self._notify_summary(on_summary, summary)
+
+        logger.info(f"OpenAI stream complete: latency_ms={(time.perf_counter() - started) * 1000:.0f} completion_tokens={completion_tokens}")
+        return "".join(parts)
+
+    @staticmethod
+    async def _notify_summary(on_summary: Callable[[str], Awaitable[None]], summary: str):
+        """Run the early-summary callback without letting a delivery failure abort generation"""
+        try:
+            await on_summary(summary)
+        except Exception:
+            logger.exception("Error delivering early daily summary")
+
+    def _fallback_daily_insight(self, daily_entries: List[Dict], language: str) -> DailyInsight:
+        """Build a totals-only daily insight for when the AI is unavailable"""
+        total_calories = sum(entry.get('total_calories', 0) for entry in daily_entries)
+        total_protein = sum(entry.get('total_protein', 0) for entry in daily_entries)
+        total_carbs = sum(entry.get('total_carbs', 0) for entry in daily_entries)
+        total_fat = sum(entry.get('total_fat', 0) for entry in daily_entries)
+
+        if language == 'ru':
+            summary = f"Сегодня записано приемов пищи: {len(daily_entries)}, всего {total_calories:.0f} ккал (белки {total_protein:.0f} г, углеводы {total_carbs:.0f} г, жиры {total_fat:.0f} г)."
+            motivational_message = "Подробный AI анализ сейчас недоступен, попробуйте чуть позже!"
+        else:
+            summary = f"You logged {len(daily_entries)} meals today, {total_calories:.0f} kcal in total ({total_protein:.0f}g protein, {total_carbs:.0f}g carbs, {total_fat:.0f}g fat)."
+            motivational_message = "Detailed AI analysis is busy right now, please try again in a bit!"
+
+        return DailyInsight(
+            summary=summary,
+            key_observations=[],
+            nutrition_highlights=[],
+            recommendations=[],
+            motivational_message=motivational_message
+        )
+
+    def _no_intake_daily_insight(self, daily_entries: List[Dict], language: str) -> DailyInsight:
+        """Build a static daily insight for days whose entries carry no calories or macros"""
+        if language == 'ru':
+            summary = f"Сегодня записано приемов пищи: {len(daily_entries)}, но в них нет калорий и макронутриентов."
+            motivational_message = "Запишите свои приемы пищи, и я подготовлю подробный анализ!"
+        else:
+            summary = f"You logged {len(daily_entries)} entries today, but none of them contain calories or macros."
+            motivational_message = "Log your meals and I'll put together a detailed analysis!"
+
+        return DailyInsight(
+            summary=summary,
+            key_observations=[],
+            nutrition_highlights=[],
+            recommendations=[],
+            motivational_message=motivational_message
+        )
+
+    def _fallback_weekly_insight(self, weekly_data: List[Dict], language: str) -> WeeklyInsight:
+        """Build a totals-only weekly insight for when the AI is unavailable"""
+        days_tracked = len({(entry.get('timestamp') or '')[:10] for entry in weekly_data})
+        avg_calories = sum(entry.get('total_calories', 0) for entry in weekly_data) / (days_tracked or 1)
+
+        if language == 'ru':
+            summary = f"На этой неделе вы записали {len(weekly_data)} приемов пищи за {days_tracked} дн., в среднем {avg_calories:.0f} ккал в день. Подробный AI анализ сейчас недоступен, попробуйте чуть позже!"
+        else:
+            summary = f"This week you logged {len(weekly_data)} meals across {days_tracked} days, averaging {avg_calories:.0f} kcal per day. Detailed AI analysis is busy right now, please try again in a bit!"
+
+        return WeeklyInsight(
+            summary=summary,
+            trends_analysis=[],
+            nutrition_patterns=[],
+            achievements=[],
+            areas_for_improvement=[],
+            personalized_recommendations=[],
+            next_week_goals=[]
+        )
+
+    def _build_daily_request_body(self, nutrition_data: str, language: str) -> Dict:
+        """Build the chat completion parameters for a single user's daily summary"""
+        system_prompt = self._get_daily_system_prompt(language)
+
+        instructions = _DAILY_USER_INSTRUCTIONS.get(language, _DAILY_USER_INSTRUCTIONS['en'])
+        
+        # Static instructions first and per-user data last, so the cacheable prefix is as long as possible
+        user_prompt = f"{instructions}\n\n{nutrition_data}"
+
+        return {
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt}
+            ],
+            "model": "gpt-5-mini",
+            "response_format": _DAILY_RESPONSE_FORMAT,
+            "max_completion_tokens": self.DAILY_MAX_COMPLETION_TOKENS,
+            "reasoning_effort": "minimal",
+            "prompt_cache_key": f"daily-{_SUMMARY_PROMPT_VERSION}-{language}"
+        }
+
+    async def submit_daily_summaries_batch(self, user_payloads: List[Tuple[int, str, str]]) -> Optional[str]:
+        """Submit daily summaries to the OpenAI Batch API for offline processing.
+
+        user_payloads is a list of (telegram_user_id, date_str, language) tuples.
+        Returns the batch id, or None if there was nothing to submit or submission failed.
+        """
+        try:
+            all_nutrition_data = await asyncio.gather(*(
+                asyncio.to_thread(self._build_daily_nutrition_data, user_id, date_str)
+                for user_id, date_str, _ in user_payloads
+            ))
+
+            lines = []
+            for (user_id, date_str, language), nutrition_data in zip(user_payloads, all_nutrition_data):
+                if not nutrition_data:
+                    continue
+                lines.append(json.dumps({
+                    "custom_id": f"{user_id}:{date_str}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": self._build_daily_request_body(nutrition_data, language)
+                }, ensure_ascii=False))
+
+            if not lines:
+                return None
+
+            input_file = await self.client.files.create(
+                file=("daily_summaries.jsonl", "\n".join(lines).encode('utf-8')),
+                purpose="batch"
+            )
+            batch = await self.client.batches.create(
+                input_file_id=input_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted daily summary batch {batch.id} for {len(lines)} users")
+            return batch.id
+
+        except Exception as e:
+            logger.exception("Error submitting daily AI summary batch")
+            return None
+
+    async def retrieve_daily_summaries_batch(self, batch_id: str) -> Optional[Dict[int, DailyInsight]]:
+        """Collect results of a submitted daily summary batch.
+
+        Returns None while the batch is still running, otherwise a dict of
+        telegram_user_id -> DailyInsight (empty if the batch failed or expired).
+        """
+        batch = await self.client.batches.retrieve(batch_id)
+
+        if batch.status in ('validating', 'in_progress', 'finalizing'):
+            return None
+
+        if batch.status != 'completed' or not batch.output_file_id:
+            logger.warning(f"Daily summary batch {batch_id} ended with status {batch.status}")
+            return {}
+
+        output = await self.client.files.content(batch.output_file_id)
+
+        results: Dict[int, DailyInsight] = {}
+        for line in output.text.splitlines():
+            try:
+                record = json.loads(line)
+                response = record.get('response') or {}
+                if response.get('status_code') != 200:
+                    continue
+                content = response['body']['choices'][0]['message']['content']
+                user_id = int(record['custom_id'].split(':', 1)[0])
+                results[user_id] = DailyInsight.model_validate_json(content)
+            except (json.JSONDecodeError, KeyError, IndexError, TypeError, ValueError):
+                logger.warning(f"Skipping malformed result line in daily summary batch {batch_id}")
+
+        return results
+
+    async def cancel_daily_summaries_batch(self, batch_id: str):
+        """Cancel a daily summary batch whose results are no longer needed"""
+        try:
+            await self.client.batches.cancel(batch_id)
+            logger.info(f"Cancelled daily summary batch {batch_id}")
+        except Exception as e:
+            logger.warning(f"Could not cancel daily summary batch {batch_id}: {e}")
+
+    def _summary_cache_key(self, kind: str, language: str, prompt_data: str) -> str:
+        """Hash everything that determines a summary's prompt into a cache key"""
+        raw = f"{kind}|{_SUMMARY_PROMPT_VERSION}|{language}|{prompt_data}"
+        return hashlib.blake2b(raw.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _get_cached_summary(self, cache_key: str, model):
+        """Return a cached insight of the given model if it is still fresh"""
+        cached = self._summary_cache.get(cache_key)
+        if not cached:
+            return None
+        
+        cached_at, fields = cached
+        if time.time() - cached_at > self.SUMMARY_CACHE_TTL_SECONDS:
+            del self._summary_cache[cache_key]
+            return None
+        
+        return model.model_construct(**fields)
+
+    def _cache_summary(self, cache_key: str, insight: BaseModel):
+        """Store an insight, dropping the oldest entries when the cache is full"""
+        self._summary_cache.pop(cache_key, None)
+        self._summary_cache[cache_key] = (time.time(), insight.model_dump())
+        while len(self._summary_cache) > self.SUMMARY_CACHE_SIZE:
+            del self._summary_cache[next(iter(self._summary_cache))]
+        
+        if self.cache_file:
+            self._summary_cache_dirty = True
+            if self._summary_cache_save_task is None or self._summary_cache_save_task.done():
+                self._summary_cache_save_task = asyncio.get_running_loop().create_task(self._save_summary_cache_soon())
+
+    async def _save_summary_cache_soon(self):
+        """Write the cache file once inserts settle, keeping the file I/O off the event loop"""
+        while self._summary_cache_dirty:
+            await asyncio.sleep(self.SUMMARY_CACHE_SAVE_DELAY_SECONDS)
+            self._summary_cache_dirty = False
+            # Copied on the loop so the worker thread never iterates a dict that is being modified
+            await asyncio.to_thread(self._save_summary_cache, dict(self._summary_cache))
+
+    def _load_summary_cache(self):
+        """Load unexpired cached summaries from file"""
+        if not self.cache_file:
+            return
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                now = time.time()
+                for cache_key, (cached_at, fields) in data.items():
+                    if now - cached_at <= self.SUMMARY_CACHE_TTL_SECONDS:
+                        self._summary_cache[cache_key] = (cached_at, fields)
+        except Exception as e:
+            logger.error(f"Error loading summary cache from file: {e}")
+            self._summary_cache = {}
+
+    def _save_summary_cache(self, summary_cache: Dict[str, Tuple[float, Dict]]):
+        """Save cached summaries to file"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+            # Written beside the target and swapped in, so a crash mid-write never leaves a truncated file
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(summary_cache, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            logger.error(f"Error saving summary cache to file: {e}")
+
+    async def generate_daily_summaries_bulk(self, user_payloads: List[Tuple[int, str, str]]) -> Dict[int, Optional[DailyInsight]]:
+        """Generate daily summaries for many users concurrently, one OpenAI call per user.
+
+        user_payloads is a list of (telegram_user_id, date_str, language) tuples.
+        """
+        semaphore = asyncio.Semaphore(self.BULK_CONCURRENCY)
+
+        async def generate(user_id: int, date_str: str, language: str) -> Optional[DailyInsight]:
+            async with semaphore:
+                return await self.generate_daily_summary(user_id, date_str, language)
+
+        insights = await asyncio.gather(*(
+            generate(user_id, date_str, language) for user_id, date_str, language in user_payloads
+        ))
+        return {user_id: insight for (user_id, _, _), insight in zip(user_payloads, insights)}
+
+    async def generate_weekly_summaries_bulk(self, user_payloads: List[Tuple[int, str]]) -> Dict[int, Optional[WeeklyInsight]]:
+        """Generate weekly summaries for many users concurrently, one OpenAI call per user.
+
+        user_payloads is a list of (telegram_user_id, language) tuples.
+        """
+        semaphore = asyncio.Semaphore(self.BULK_CONCURRENCY)
+
+        async def generate(user_id: int, language: str) -> Optional[WeeklyInsight]:
+            async with semaphore:
+                return await self.generate_weekly_summary(user_id, language)
+
+        insights = await asyncio.gather(*(
+            generate(user_id, language) for user_id, language in user_payloads
+        ))
+        return {user_id: insight for (user_id, _), insight in zip(user_payloads, insights)}
+
     async def generate_weekly_summary(self, telegram_user_id: int, language: str = 'en') -> Optional[WeeklyInsight]:
         """Generate AI-powered weekly nutrition analysis"""
         try:
             # Get user's food data for the past week
-            end_date = datetime.now()
+            end_date = date.today()
             start_date = end_date - timedelta(days=7)
+            start_str = start_date.isoformat()
             
-            weekly_data = self.database_service.get_weekly_data(
+            weekly_data = await asyncio.to_thread(
+                self._get_entries_in_range,
                 telegram_user_id, 
-                start_date.strftime('%Y-%m-%d'),
-                end_date.strftime('%Y-%m-%d')
+                start_str,
+                end_date.isoformat()
             )
             
-            if not weekly_data:
+            # Too little data for a meaningful analysis; skip the comparison query and the AI call
+            if len(weekly_data) < self.MIN_WEEK_ENTRIES:
+                return None
+            if len({(entry.get('timestamp') or '')[:10] for entry in weekly_data}) < self.MIN_WEEK_DAYS:
                 return None
             
             # Get previous week for comparison
-            prev_week_data = self.database_service.get_weekly_data(
+            prev_week_data = await asyncio.to_thread(
+                self._get_entries_in_range,
                 telegram_user_id,
-                (start_date - timedelta(days=7)).strftime('%Y-%m-%d'),
-                start_date.strftime('%Y-%m-%d')
+                (start_date - timedelta(days=7)).isoformat(),
+                start_str
             )
             
             # Format data for AI analysis
             nutrition_analysis = self._format_weekly_data_for_ai(weekly_data, prev_week_data)
             
-            system_prompt = self._get_weekly_system_prompt(language)
-
-            user_prompt_text = "Analyze this week's nutrition data and provide insights:" if language == 'en' else "Проанализируй данные о питании за эту неделю и предоставь insights:"
-            concise_instruction = "Please provide a CONCISE weekly analysis. Keep all responses short and focused - aim for 1-2 sentences per bullet point maximum." if language == 'en' else "Предоставь КРАТКИЙ недельный анализ. Держи все ответы короткими и сфокусированными - стремись к максимум 1-2 предложениям на пункт."
+            cache_key = self._summary_cache_key('weekly', language, nutrition_analysis)
+            cached_insight = self._get_cached_summary(cache_key, WeeklyInsight)
+            if cached_insight:
+                return cached_insight
             
-            user_prompt = f"""{user_prompt_text}
-
-{nutrition_analysis}
+            system_prompt = self._get_weekly_system_prompt(language)
 
-{concise_instruction}"""
+            instructions = _WEEKLY_USER_INSTRUCTIONS.get(language, _WEEKLY_USER_INSTRUCTIONS['en'])
+            user_prompt = f"{instructions}\n\n{nutrition_analysis}"
 
-            response = self.client.chat.completions.create(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                model="gpt-5-mini"
-            )
+            try:
+                response = await self._create_chat_completion(
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    model="gpt-5-mini",
+                    response_format=_WEEKLY_RESPONSE_FORMAT,
+                    max_completion_tokens=self.WEEKLY_MAX_COMPLETION_TOKENS,
+                    reasoning_effort="minimal",
+                    prompt_cache_key=f"weekly-{_SUMMARY_PROMPT_VERSION}-{language}"
+                )
+            except RateLimitError:
+                logger.warning("Rate limited while generating weekly AI summary, using totals-only summary")
+                return self._fallback_weekly_insight(weekly_data, language)
             
             if response.choices[0].message.content:
-                # Parse the response manually since we're not using structured output
                 content = response.choices[0].message.content
                 try:
-                    import json
-                    parsed_data = json.loads(content)
-                    return WeeklyInsight(
-                        summary=parsed_data.get('summary', ''),
-                        trends_analysis=parsed_data.get('trends_analysis', []),
-                        nutrition_patterns=parsed_data.get('nutrition_patterns', []),
-                        achievements=parsed_data.get('achievements', []),
-                        areas_for_improvement=parsed_data.get('areas_for_improvement', []),
-                        personalized_recommendations=parsed_data.get('personalized_recommendations', []),
-                        next_week_goals=parsed_data.get('next_week_goals', [])
-                    )
-                except (json.JSONDecodeError, KeyError):
+                    insight = WeeklyInsight.model_validate_json(content)
+                    self._cache_summary(cache_key, insight)
+                    return insight
+                except ValidationError:
                     # Fallback: create a simple summary from the content
                     return WeeklyInsight(
                         summary=content,
@@ -281,9 +713,22 @@ Please respond with a JSON object containing:
             return None
             
         except Exception as e:
-            print(f"Error generating weekly AI summary: {e}")
+            logger.exception("Error generating weekly AI summary")
             return None
-    
+
+    def _build_daily_nutrition_data(self, telegram_user_id: int, date_str: str, daily_entries: Optional[List[Dict]] = None) -> Optional[str]:
+        """Fetch a user's day plus 7-day context and format it for the AI prompt"""
+        if daily_entries is None:
+            daily_entries = self._get_daily_nutrition_data(telegram_user_id, date_str)
+
+        if not daily_entries:
+            return None
+
+        # Get recent context (last 7 days for comparison)
+        context_data = self._get_recent_context(telegram_user_id, date_str, days=7)
+
+        return self._format_daily_data_for_ai(daily_entries, context_data, date_str)
+
     def _get_daily_nutrition_data(self, telegram_user_id: int, date_str: str) -> List[Dict]:
         """Get detailed nutrition data for a specific day"""
         return self.database_service.get_weekly_data(telegram_user_id, date_str, date_str)
@@ -291,87 +736,183 @@ Please respond with a JSON object containing:
     def _get_recent_context(self, telegram_user_id: int, current_date: str, days: int = 7) -> List[Dict]:
         """Get recent nutrition data for context"""
         try:
-            end_date = datetime.strptime(current_date, '%Y-%m-%d')
-            start_date = end_date - timedelta(days=days)
-            return self.database_service.get_weekly_data(
+            start_date = date.fromisoformat(current_date) - timedelta(days=days)
+            return self._get_entries_in_range(
                 telegram_user_id,
-                start_date.strftime('%Y-%m-%d'),
+                start_date.isoformat(),
                 current_date
             )
         except Exception as e:
-            print(f"Error getting recent context: {e}")
+            logger.exception("Error getting recent context")
             return []
     
+    def _get_entries_in_range(self, telegram_user_id: int, start_date: str, end_date: str) -> List[Dict]:
+        """Get a user's entries for a date range, reusing a lookup made within the last few seconds"""
+        cache_key = (telegram_user_id, start_date, end_date)
+        now = time.monotonic()
+        with self._entry_range_lock:
+            cached = self._entry_range_cache.get(cache_key)
+        if cached and now - cached[0] <= self.ENTRY_RANGE_CACHE_TTL_SECONDS:
+            # Every caller gets its own list, so one that modifies it can't change the cached result
+            return list(cached[1])
+        
+        # The query runs outside the lock, so a slow lookup doesn't hold up other users
+        entries = self.database_service.get_weekly_data(telegram_user_id, start_date, end_date)
+        with self._entry_range_lock:
+            cache = self._entry_range_cache
+            cache.pop(cache_key, None)
+            cache[cache_key] = (now, tuple(entries))
+            while len(cache) > self.ENTRY_RANGE_CACHE_SIZE:
+                del cache[next(iter(cache))]
+        return entries
+    
+    def invalidate_user_entries(self, telegram_user_id: int):
+        """Drop a user's cached entry ranges, so a meal they just logged shows up in their next summary"""
+        with self._entry_range_lock:
+            cache = self._entry_range_cache
+            for cache_key in [key for key in cache if key[0] == telegram_user_id]:
+                del cache[cache_key]
+    
     def _format_daily_data_for_ai(self, daily_entries: List[Dict], context_data: List[Dict], date_str: str) -> str:
         """Format daily nutrition data for AI analysis"""
-        formatted_data = f"=== DAILY NUTRITION ANALYSIS - {date_str} ===\n\n"
+        parts = [f"=== DAILY NUTRITION ANALYSIS - {date_str} ===\n\n"]
         
         if not daily_entries:
-            return formatted_data + "No food entries logged today."
+            parts.append("No food entries logged today.")
+            return "".join(parts)
         
-        total_calories = sum(entry.get('total_calories', 0) for entry in daily_entries)
-        total_protein = sum(entry.get('total_protein', 0) for entry in daily_entries)
-        total_carbs = sum(entry.get('total_carbs', 0) for entry in daily_entries)
-        total_fat = sum(entry.get('total_fat', 0) for entry in daily_entries)
+        # Accumulate all macros in a single pass over the entries
+        total_calories = total_protein = total_carbs = total_fat = 0
+        for entry in daily_entries:
+            total_calories += entry.get('total_calories', 0)
+            total_protein += entry.get('total_protein', 0)
+            total_carbs += entry.get('total_carbs', 0)
+            total_fat += entry.get('total_fat', 0)
         
-        formatted_data += f"DAILY TOTALS:\n"
-        formatted_data += f"- Calories: {total_calories:.0f} kcal\n"
-        formatted_data += f"- Protein: {total_protein:.1f}g ({(total_protein * 4 / total_calories * 100):.1f}% of calories)\n"
-        formatted_data += f"- Carbs: {total_carbs:.1f}g ({(total_carbs * 4 / total_calories * 100):.1f}% of calories)\n"
-        formatted_data += f"- Fat: {total_fat:.1f}g ({(total_fat * 9 / total_calories * 100):.1f}% of calories)\n"
-        formatted_data += f"- Meals logged: {len(daily_entries)}\n\n"
+        parts.append("DAILY TOTALS:\n")
+        parts.append(f"- Calories: {total_calories:.0f} kcal\n")
+        # Calorie shares are only meaningful (and only safe to divide by) when calories were logged
+        if total_calories > 0:
+            parts.append(f"- Protein: {total_protein:.1f}g ({(total_protein * 4 / total_calories * 100):.1f}% of calories)\n")
+            parts.append(f"- Carbs: {total_carbs:.1f}g ({(total_carbs * 4 / total_calories * 100):.1f}% of calories)\n")
+            parts.append(f"- Fat: {total_fat:.1f}g ({(total_fat * 9 / total_calories * 100):.1f}% of calories)\n")
+        else:
+            parts.append(f"- Protein: {total_protein:.1f}g\n")
+            parts.append(f"- Carbs: {total_carbs:.1f}g\n")
+            parts.append(f"- Fat: {total_fat:.1f}g\n")
+        parts.append(f"- Meals logged: {len(daily_entries)}\n\n")
         
-        formatted_data += "MEAL BREAKDOWN:\n"
+        parts.append("MEAL BREAKDOWN:\n")
         for i, entry in enumerate(daily_entries, 1):
-            meal_time = entry.get('timestamp', '').split('T')[1][:5] if 'T' in entry.get('timestamp', '') else 'Unknown time'
-            formatted_data += f"\nMeal {i} ({meal_time}):\n"
-            formatted_data += f"  Total: {entry.get('total_calories', 0):.0f} kcal, "
-            formatted_data += f"{entry.get('total_protein', 0):.1f}g protein, "
-            formatted_data += f"{entry.get('total_carbs', 0):.1f}g carbs, "
-            formatted_data += f"{entry.get('total_fat', 0):.1f}g fat\n"
+            # ISO timestamps: 'YYYY-MM-DDTHH:MM...' (sqlite3 stores datetimes with a space separator)
+            ts = entry.get('timestamp') or ''
+            meal_time = ts[11:16] if len(ts) >= 16 and ts[10] in 'T ' else 'Unknown time'
+            parts.append(_MEAL_HEADER_LINE(i, meal_time))
+            parts.append(_MEAL_TOTALS_LINE(
+                entry.get('total_calories', 0),
+                entry.get('total_protein', 0),
+                entry.get('total_carbs', 0),
+                entry.get('total_fat', 0)
+            ))
             
             if 'food_items' in entry:
-                formatted_data += "  Foods consumed:\n"
-                for item in entry['food_items']:
-                    formatted_data += f"    - {item.get('name', 'Unknown')} ({item.get('quantity', 'Unknown amount')}): "
-                    formatted_data += f"{item.get('calories', 0):.0f} kcal\n"
+                parts.append("  Foods consumed:\n")
+                # Collapse repeated (name, quantity) items into one line to keep the prompt short
+                item_counts = Counter(
+                    (item.get('name', 'Unknown'), item.get('quantity', 'Unknown amount'), item.get('calories', 0))
+                    for item in entry['food_items']
+                )
+                for (name, quantity, calories), count in item_counts.items():
+                    if count > 1:
+                        parts.append(_REPEATED_FOOD_ITEM_LINE(name, count, quantity, calories))
+                    else:
+                        parts.append(_FOOD_ITEM_LINE(name, quantity, calories))
         
         # Add context from recent days
         if context_data:
-            recent_avg_calories = sum(e.get('total_calories', 0) for e in context_data) / len(context_data)
-            formatted_data += f"\n7-DAY CONTEXT:\n"
-            formatted_data += f"- Average daily calories (last 7 days): {recent_avg_calories:.0f} kcal\n"
-            formatted_data += f"- Today vs recent average: {((total_calories - recent_avg_calories) / recent_avg_calories * 100):+.1f}%\n"
+            recent_avg_calories, _ = self._average_daily_calories(context_data)
+            parts.append("\n7-DAY CONTEXT:\n")
+            parts.append(f"- Average daily calories (last 7 days): {recent_avg_calories:.0f} kcal\n")
+            if recent_avg_calories:
+                parts.append(f"- Today vs recent average: {((total_calories - recent_avg_calories) / recent_avg_calories * 100):+.1f}%\n")
         
-        return formatted_data
+        return "".join(parts)
+    
+    @staticmethod
+    def _average_daily_calories(entries: List[Dict]) -> Tuple[float, int]:
+        """Return (average calories per logged day, number of logged days) in a single pass"""
+        total_calories = 0
+        days = set()
+        for entry in entries:
+            total_calories += entry.get('total_calories', 0)
+            days.add((entry.get('timestamp') or '')[:10])
+        return (total_calories / len(days) if days else 0), len(days)
     
     def _format_weekly_data_for_ai(self, weekly_data: List[Dict], prev_week_data: List[Dict]) -> str:
         """Format weekly nutrition data for AI analysis"""
         if not weekly_data:
             return "No nutrition data available for this week."
         
-        # Group by day
-        daily_totals = {}
-        daily_foods = {}
+        # Group by day, accumulating the week's totals in the same pass
+        daily_totals = defaultdict(lambda: {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'meals': 0})
+        daily_foods = defaultdict(list)
+        week_calories = week_protein = week_carbs = week_fat = 0
         
         for entry in weekly_data:
-            date = entry.get('timestamp', '')[:10]
-            if date not in daily_totals:
-                daily_totals[date] = {'calories': 0, 'protein': 0, 'carbs': 0, 'fat': 0, 'meals': 0}
-                daily_foods[date] = []
+            # 'YYYY-MM-DD' prefix of the ISO/sqlite timestamp; no parsing or split needed
+            date = (entry.get('timestamp') or '')[:10]
+            calories = entry.get('total_calories', 0)
+            protein = entry.get('total_protein', 0)
+            carbs = entry.get('total_carbs', 0)
+            fat = entry.get('total_fat', 0)
             
-            daily_totals[date]['calories'] += entry.get('total_calories', 0)
-            daily_totals[date]['protein'] += entry.get('total_protein', 0)
-            daily_totals[date]['carbs'] += entry.get('total_carbs', 0)
-            daily_totals[date]['fat'] += entry.get('total_fat', 0)
-            daily_totals[date]['meals'] += 1
+            day = daily_totals[date]
+            day['calories'] += calories
+            day['protein'] += protein
+            day['carbs'] += carbs
+            day['fat'] += fat
+            day['meals'] += 1
+            
+            week_calories += calories
+            week_protein += protein
+            week_carbs += carbs
+            week_fat += fat
             
             if 'food_items' in entry:
-                daily_foods[date].extend([item.get('name', 'Unknown') for item in entry['food_items']])
+                daily_foods[date].extend(item.get('name', 'Unknown') for item in entry['food_items'])
         
-        formatted_data = "=== WEEKLY NUTRITION ANALYSIS ===\n\n"
+        parts = ["=== WEEKLY NUTRITION ANALYSIS ===\n\n"]
         
         # Weekly averages
         days_tracked = len(daily_totals)
         if days_tracked > 0:
-            avg_calories = sum(day['calories'] for day in daily_totals.values()) / days_tracked
\ No newline at end of file
+            total_meals = len(weekly_data)
+            avg_calories = week_calories / days_tracked
+            avg_protein = week_protein / days_tracked
+            avg_carbs = week_carbs / days_tracked
+            avg_fat = week_fat / days_tracked
+            
+            parts.append("WEEKLY AVERAGES:\n")
+            parts.append(f"- Days tracked: {days_tracked}/7\n")
+            parts.append(f"- Total meals logged: {total_meals}\n")
+            parts.append(f"- Average daily calories: {avg_calories:.0f} kcal\n")
+            parts.append(f"- Average daily protein: {avg_protein:.1f}g\n")
+            parts.append(f"- Average daily carbs: {avg_carbs:.1f}g\n")
+            parts.append(f"- Average daily fat: {avg_fat:.1f}g\n\n")
+        
+        parts.append("DAILY BREAKDOWN:\n")
+        for date in sorted(daily_totals):
+            day = daily_totals[date]
+            parts.append(_WEEKLY_DAY_LINE(date, day['calories'], day['protein'], day['carbs'], day['fat'], day['meals']))
+            foods = daily_foods.get(date)
+            if foods:
+                parts.append(f"  Foods: {', '.join(foods)}\n")
+        
+        # Compare with the previous week
+        if prev_week_data:
+            prev_avg_calories, prev_days = self._average_daily_calories(prev_week_data)
+            parts.append("\nPREVIOUS WEEK COMPARISON:\n")
+            parts.append(f"- Previous week average daily calories: {prev_avg_calories:.0f} kcal\n")
+            parts.append(f"- Days tracked previous week: {prev_days}\n")
+        
+        return "".join(parts)
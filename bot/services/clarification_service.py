@@ -1,60 +1,94 @@
 """
 Service for managing food analysis clarifications and user state
 """
+import heapq
 import json
+import logging
 import os
-from typing import Dict, Optional, Any
+import sqlite3
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime, timedelta
 from models.nutrition_models import PendingClarification
 
+logger = logging.getLogger(__name__)
+
 class ClarificationService:
     """Manages pending clarifications and user states"""
-    
-    def __init__(self, storage_file: str = '/app/data/pending_clarifications.json'):
+
+    def __init__(self, storage_file: str = '/app/data/pending_clarifications.db'):
         self.storage_file = storage_file
+        # In-memory mirror of the table, so the per-message lookups never touch disk
         self._pending_clarifications: Dict[int, PendingClarification] = {}
-        self._load_from_file()
-    
-    def _load_from_file(self):
-        """Load pending clarifications from file"""
+        # Min-heap of (timestamp, user_id) so cleanup only visits expired entries;
+        # entries left behind by overwritten or cleared clarifications are skipped lazily
+        self._expiry_heap: List[Tuple[datetime, int]] = []
+        self._connection: Optional[sqlite3.Connection] = None
+        self._initialize_storage()
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """Return the store's connection, opening it on first use; `with` on it commits without closing it"""
+        if self._connection is None:
+            connection = sqlite3.connect(self.storage_file)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection = connection
+        return self._connection
+
+    def _initialize_storage(self):
+        """Create the clarifications table and load pending clarifications"""
         try:
-            if os.path.exists(self.storage_file):
-                with open(self.storage_file, 'r') as f:
-                    data = json.load(f)
-                    for user_id_str, clarification_dict in data.items():
-                        user_id = int(user_id_str)
-                        # Convert timestamp string back to datetime
-                        clarification_dict['timestamp'] = datetime.fromisoformat(clarification_dict['timestamp'])
-                        clarification = PendingClarification(**clarification_dict)
-                        self._pending_clarifications[user_id] = clarification
+            os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
+            with self._get_connection() as conn:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS clarifications (
+                        user_id INTEGER PRIMARY KEY,
+                        payload TEXT NOT NULL,
+                        ts REAL NOT NULL
+                    )
+                """)
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_clarifications_ts ON clarifications (ts)")
+                self._import_legacy_json_store(conn)
+                rows = conn.execute("SELECT user_id, payload FROM clarifications").fetchall()
+
+            for user_id, payload in rows:
+                clarification = PendingClarification.model_validate_json(payload)
+                self._pending_clarifications[user_id] = clarification
+                self._expiry_heap.append((clarification.timestamp, user_id))
+            heapq.heapify(self._expiry_heap)
         except Exception as e:
-            print(f"Error loading clarifications from file: {e}")
+            logger.error(f"Error loading clarifications from storage: {e}")
             self._pending_clarifications = {}
-    
-    def _save_to_file(self):
-        """Save pending clarifications to file"""
+            self._expiry_heap = []
+
+    def _import_legacy_json_store(self, conn: sqlite3.Connection):
+        """Move clarifications from the old pending_clarifications.json next to the database into the table, once"""
+        legacy_file = os.path.splitext(self.storage_file)[0] + '.json'
+        if not os.path.exists(legacy_file):
+            return
+
         try:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(self.storage_file), exist_ok=True)
-            
-            # Convert to serializable format
-            data = {}
-            for user_id, clarification in self._pending_clarifications.items():
-                clarification_dict = clarification.model_dump()
-                # Convert datetime to string for JSON serialization
-                clarification_dict['timestamp'] = clarification.timestamp.isoformat()
-                data[str(user_id)] = clarification_dict
-            
-            with open(self.storage_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            with open(legacy_file, 'r') as f:
+                data = json.load(f)
+            clarifications = [PendingClarification.model_validate(clarification_dict) for clarification_dict in data.values()]
         except Exception as e:
-            print(f"Error saving clarifications to file: {e}")
-    
+            # The file is left in place, so nothing is lost if it can be fixed and imported on a later start
+            logger.error(f"Error importing clarifications from {legacy_file}: {e}")
+            return
+
+        # Rows already in the table are newer than the old file, so they are kept
+        conn.executemany(
+            "INSERT OR IGNORE INTO clarifications (user_id, payload, ts) VALUES (?, ?, ?)",
+            [(c.user_id, c.model_dump_json(), c.timestamp.timestamp()) for c in clarifications]
+        )
+        conn.commit()
+        os.remove(legacy_file)
+        logger.info(f"Imported {len(clarifications)} pending clarifications from {legacy_file}")
+
     def has_pending_clarification(self, user_id: int) -> bool:
         """Check if user has pending clarification"""
         return user_id in self._pending_clarifications
-    
-    def store_pending_clarification(self, 
+
+    def store_pending_clarification(self,
                                     user_id: int,
                                     original_data: Dict[str, Any],
                                     analysis_text: str,
@@ -71,32 +105,50 @@ class ClarificationService:
             timestamp=datetime.now(),
             media_type=media_type
         )
-        
+
         self._pending_clarifications[user_id] = clarification
-        self._save_to_file()
-    
+        heapq.heappush(self._expiry_heap, (clarification.timestamp, user_id))
+        try:
+            with self._get_connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO clarifications (user_id, payload, ts) VALUES (?, ?, ?)",
+                    (user_id, clarification.model_dump_json(), clarification.timestamp.timestamp())
+                )
+        except Exception as e:
+            logger.error(f"Error saving clarification for user {user_id}: {e}")
+
     def get_pending_clarification(self, user_id: int) -> Optional[PendingClarification]:
         """Get pending clarification for user"""
         return self._pending_clarifications.get(user_id)
-    
+
     def clear_pending_clarification(self, user_id: int) -> None:
         """Clear pending clarification for user"""
         if user_id in self._pending_clarifications:
             del self._pending_clarifications[user_id]
-            self._save_to_file()
-    
+            try:
+                with self._get_connection() as conn:
+                    conn.execute("DELETE FROM clarifications WHERE user_id = ?", (user_id,))
+            except Exception as e:
+                logger.error(f"Error clearing clarification for user {user_id}: {e}")
+
     def cleanup_expired_clarifications(self, max_age_hours: int = 24) -> None:
         """Remove clarifications older than specified hours"""
         cutoff_time = datetime.now() - timedelta(hours=max_age_hours)
         expired_users = []
-        
-        for user_id, clarification in self._pending_clarifications.items():
-            if clarification.timestamp < cutoff_time:
+
+        while self._expiry_heap and self._expiry_heap[0][0] < cutoff_time:
+            timestamp, user_id = heapq.heappop(self._expiry_heap)
+            clarification = self._pending_clarifications.get(user_id)
+            # Skip stale heap entries whose clarification was replaced or already cleared
+            if clarification and clarification.timestamp == timestamp:
+                del self._pending_clarifications[user_id]
                 expired_users.append(user_id)
-        
-        for user_id in expired_users:
-            del self._pending_clarifications[user_id]
-        
+
         if expired_users:
-            self._save_to_file()
-            print(f"Cleaned up {len(expired_users)} expired clarifications")
+            try:
+                with self._get_connection() as conn:
+                    conn.execute("DELETE FROM clarifications WHERE ts < ?", (cutoff_time.timestamp(),))
+            except Exception as e:
+                logger.error(f"Error deleting expired clarifications: {e}")
+
+            logger.info(f"Cleaned up {len(expired_users)} expired clarifications")
@@ -2,16 +2,83 @@
 Service for generating compliments for healthy food choices.
 """
 import random
-from typing import List, Optional
+import re
+import unicodedata
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Tuple
 from models.nutrition_models import FoodItem
 
 
+def _keyword_trie_pattern(keywords: Sequence[str]) -> str:
+    """Build a regex matching any keyword, with shared prefixes factored out trie-style"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = {}  # end-of-keyword marker
+    return _trie_node_pattern(trie)
+
+
+def _normalize_food_text(text: str) -> str:
+    """Fold text for keyword matching: NFC, casefold, and 'ё' spelled as 'е' (свёкла -> свекла)"""
+    return unicodedata.normalize('NFC', text).casefold().replace('ё', 'е')
+
+
+def _normalized_keywords(healthy_foods: Mapping[str, Sequence[str]]) -> Mapping[str, Tuple[str, ...]]:
+    """Fold every keyword once, keeping HEALTHY_FOODS itself as the human-edited source"""
+    return MappingProxyType({
+        category: tuple(_normalize_food_text(food) for food in foods)
+        for category, foods in healthy_foods.items()
+    })
+
+
+def _split_compliment_templates(compliments: Mapping[str, Mapping[str, Sequence[str]]]) -> Dict[Tuple[str, str], Tuple[Tuple[str, str], ...]]:
+    """Pre-split each '{food}' template into (prefix, suffix), keyed by (language, category) for a single lookup"""
+    return {
+        (language, category): tuple((prefix, suffix) for prefix, _, suffix in (template.partition('{food}') for template in templates))
+        for language, categories in compliments.items()
+        for category, templates in categories.items()
+    }
+
+
+def _single_word_keyword_index(healthy_foods: Mapping[str, Sequence[str]]) -> Dict[str, FrozenSet[str]]:
+    """Map each single-word keyword to the categories it belongs to"""
+    index = {}
+    for category, foods in healthy_foods.items():
+        for food in foods:
+            if ' ' not in food:
+                index.setdefault(food, set()).add(category)
+    return {food: frozenset(categories) for food, categories in index.items()}
+
+
+def _trie_node_pattern(node: dict) -> str:
+    """Render a trie node as a regex; single-child chains collapse into one literal run"""
+    branches = []
+    for char in sorted(key for key in node if key):
+        child = node[char]
+        run = char
+        while len(child) == 1 and '' not in child:
+            (next_char, child), = child.items()
+            run += next_char
+        branches.append(re.escape(run) + _trie_node_pattern(child))
+    
+    if not branches:
+        return ''
+    is_keyword_end = '' in node
+    if len(branches) == 1 and not is_keyword_end:
+        return branches[0]
+    group = '(?:' + '|'.join(branches) + ')'
+    return group + '?' if is_keyword_end else group
+
+
 class ComplimentService:
     """Service for identifying healthy foods and generating compliments"""
     
     # Categories of healthy foods (English and Russian)
-    HEALTHY_FOODS = {
-        'vegetables': [
+    HEALTHY_FOODS = MappingProxyType({
+        'vegetables': (
             'spinach', 'broccoli', 'kale', 'lettuce', 'arugula', 'cucumber', 'tomato', 
             'bell pepper', 'carrot', 'celery', 'zucchini', 'squash', 'asparagus',
             'brussels sprouts', 'cauliflower', 'cabbage', 'onion', 'garlic', 'leek',
@@ -22,8 +89,8 @@ class ComplimentService:
             'перец', 'морковь', 'сельдерей', 'кабачок', 'тыква', 'спаржа',
             'цветная капуста', 'лук', 'чеснок', 'редис', 'свекла', 'репа',
             'батат', 'баклажан', 'артишок', 'грибы', 'гриб'
-        ],
-        'fruits': [
+        ),
+        'fruits': (
             'apple', 'banana', 'orange', 'berries', 'strawberry', 'blueberry', 
             'raspberry', 'blackberry', 'grape', 'melon', 'watermelon', 'cantaloupe',
             'pear', 'peach', 'plum', 'apricot', 'cherry', 'kiwi', 'mango', 'papaya',
@@ -35,8 +102,8 @@ class ComplimentService:
             'груша', 'персик', 'слива', 'абрикос', 'вишня', 'киви', 'манго',
             'ананас', 'авокадо', 'лимон', 'лайм', 'грейпфрут', 'гранат',
             'клюква', 'инжир', 'финик', 'чернослив', 'изюм'
-        ],
-        'whole_grains': [
+        ),
+        'whole_grains': (
             'quinoa', 'brown rice', 'oats', 'barley', 'buckwheat', 'millet',
             'whole wheat', 'whole grain', 'bulgur', 'farro', 'amaranth', 'teff',
             'wild rice', 'steel cut oats', 'rolled oats',
@@ -44,8 +111,8 @@ class ComplimentService:
             'киноа', 'бурый рис', 'овес', 'овсянка', 'ячмень', 'гречка', 'пшено',
             'цельная пшеница', 'цельное зерно', 'булгур', 'полба', 'амарант',
             'дикий рис', 'овсяные хлопья'
-        ],
-        'lean_proteins': [
+        ),
+        'lean_proteins': (
             'chicken breast', 'turkey breast', 'fish', 'salmon', 'tuna', 'cod',
             'tilapia', 'sardines', 'mackerel', 'tofu', 'tempeh', 'legumes', 'beans',
             'lentils', 'chickpeas', 'black beans', 'kidney beans', 'pinto beans',
@@ -57,8 +124,8 @@ class ComplimentService:
             'чечевица', 'нут', 'черная фасоль', 'красная фасоль',
             'белая фасоль', 'эдамаме', 'яичные белки', 'постная говядина',
             'постная свинина', 'морепродукты', 'краб', 'креветки', 'омар'
-        ],
-        'healthy_fats': [
+        ),
+        'healthy_fats': (
             'avocado', 'nuts', 'almonds', 'walnuts', 'pecans', 'cashews', 'pistachios',
             'brazil nuts', 'hazelnuts', 'seeds', 'chia seeds', 'flax seeds', 
             'pumpkin seeds', 'sunflower seeds', 'sesame seeds', 'olive oil',
@@ -69,112 +136,112 @@ class ComplimentService:
             'льняные семена', 'тыквенные семечки', 'подсолнечные семечки',
             'кунжутные семена', 'оливковое масло', 'кокосовое масло',
             'ореховое масло', 'миндальное масло', 'арахисовое масло'
-        ],
-        'dairy_alternatives': [
+        ),
+        'dairy_alternatives': (
             'greek yogurt', 'cottage cheese', 'kefir', 'almond milk', 'oat milk',
             'soy milk', 'coconut milk', 'cashew milk', 'low fat milk', 'skim milk',
             # Russian names
             'греческий йогурт', 'творог', 'кефир', 'миндальное молоко', 'овсяное молоко',
             'соевое молоко', 'кокосовое молоко', 'молоко кешью', 'обезжиренное молоко',
             'молоко', 'йогурт'
-        ]
-    }
+        )
+    })
     
     # Compliment templates for different categories
-    COMPLIMENTS = {
-        'en': {
-            'vegetables': [
+    COMPLIMENTS = MappingProxyType({
+        'en': MappingProxyType({
+            'vegetables': (
                 "Great choice with the {food}! 🥬 Packed with vitamins and fiber!",
                 "Love seeing {food} on your plate! 🌿 Your body will thank you!",
                 "Excellent vegetable choice with {food}! 🥕 So many nutrients!",
                 "Fantastic! {food} is a nutritional powerhouse! 💚",
                 "Way to go with the {food}! 🌱 Getting those essential vitamins!",
-            ],
-            'fruits': [
+            ),
+            'fruits': (
                 "Wonderful choice with {food}! 🍎 Natural sweetness and vitamins!",
                 "Love the {food}! 🍓 Antioxidants and natural energy!",
                 "Great pick with {food}! 🥝 Nature's candy with benefits!",
                 "Awesome! {food} brings natural vitamins and fiber! 🍊",
                 "Excellent fruit choice with {food}! 🍌 Healthy and delicious!",
-            ],
-            'whole_grains': [
+            ),
+            'whole_grains': (
                 "Fantastic choice with {food}! 🌾 Great source of complex carbs!",
                 "Love the {food}! 💪 Sustained energy and fiber!",
                 "Excellent grain choice! {food} provides lasting nutrition! 🌿",
                 "Way to go with {food}! 🌾 Your energy levels will love this!",
                 "Great pick! {food} offers wonderful nutritional benefits! ✨",
-            ],
-            'lean_proteins': [
+            ),
+            'lean_proteins': (
                 "Excellent protein choice with {food}! 💪 Building those muscles!",
                 "Great pick with {food}! 🐟 Quality protein for your body!",
                 "Love seeing {food}! 🏋️ Perfect for muscle recovery and growth!",
                 "Fantastic protein source with {food}! 💪 Your muscles will thank you!",
                 "Awesome choice! {food} provides excellent lean protein! 🌟",
-            ],
-            'healthy_fats': [
+            ),
+            'healthy_fats': (
                 "Smart choice with {food}! 🥑 Healthy fats for brain and heart!",
                 "Love the {food}! 🧠 Great for cognitive function!",
                 "Excellent healthy fat choice! {food} supports overall wellness! ✨",
                 "Way to go with {food}! 💚 Your heart will love these healthy fats!",
                 "Fantastic! {food} provides essential fatty acids! 🌟",
-            ],
-            'dairy_alternatives': [
+            ),
+            'dairy_alternatives': (
                 "Great choice with {food}! 🥛 Calcium and protein goodness!",
                 "Love the {food}! 💪 Supporting bone health!",
                 "Excellent pick! {food} provides quality nutrition! ✨",
                 "Way to go with {food}! 🌟 Smart nutritional choice!",
                 "Fantastic! {food} offers great nutritional benefits! 💚",
-            ]
-        },
-        'ru': {
-            'vegetables': [
+            )
+        }),
+        'ru': MappingProxyType({
+            'vegetables': (
                 "Отличный выбор с {food}! 🥬 Полны витаминов и клетчатки!",
                 "Рад видеть {food} на вашей тарелке! 🌿 Ваше тело скажет спасибо!",
                 "Превосходный выбор овощей с {food}! 🥕 Столько питательных веществ!",
                 "Фантастика! {food} - это питательная электростанция! 💚",
                 "Так держать с {food}! 🌱 Получаете незаменимые витамины!",
-            ],
-            'fruits': [
+            ),
+            'fruits': (
                 "Замечательный выбор с {food}! 🍎 Натуральная сладость и витамины!",
                 "Обожаю {food}! 🍓 Антиоксиданты и натуральная энергия!",
                 "Отличный выбор с {food}! 🥝 Природные сладости с пользой!",
                 "Потрясающе! {food} приносит натуральные витамины и клетчатку! 🍊",
                 "Превосходный выбор фруктов с {food}! 🍌 Полезно и вкусно!",
-            ],
-            'whole_grains': [
+            ),
+            'whole_grains': (
                 "Фантастический выбор с {food}! 🌾 Отличный источник сложных углеводов!",
                 "Обожаю {food}! 💪 Длительная энергия и клетчатка!",
                 "Превосходный выбор зерновых! {food} обеспечивает долговременное питание! 🌿",
                 "Так держать с {food}! 🌾 Ваши энергетические уровни полюбят это!",
                 "Отличный выбор! {food} предлагает замечательные питательные преимущества! ✨",
-            ],
-            'lean_proteins': [
+            ),
+            'lean_proteins': (
                 "Превосходный выбор белка с {food}! 💪 Наращиваете мышцы!",
                 "Отличный выбор с {food}! 🐟 Качественный белок для вашего тела!",
                 "Рад видеть {food}! 🏋️ Идеально для восстановления и роста мышц!",
                 "Фантастический источник белка с {food}! 💪 Ваши мышцы скажут спасибо!",
                 "Потрясающий выбор! {food} обеспечивает превосходный постный белок! 🌟",
-            ],
-            'healthy_fats': [
+            ),
+            'healthy_fats': (
                 "Умный выбор с {food}! 🥑 Полезные жиры для мозга и сердца!",
                 "Обожаю {food}! 🧠 Отлично для когнитивных функций!",
                 "Превосходный выбор полезных жиров! {food} поддерживает общее благополучие! ✨",
                 "Так держать с {food}! 💚 Ваше сердце полюбит эти полезные жиры!",
                 "Фантастика! {food} обеспечивает незаменимые жирные кислоты! 🌟",
-            ],
-            'dairy_alternatives': [
+            ),
+            'dairy_alternatives': (
                 "Отличный выбор с {food}! 🥛 Кальций и белковая польза!",
                 "Обожаю {food}! 💪 Поддерживает здоровье костей!",
                 "Превосходный выбор! {food} обеспечивает качественное питание! ✨",
                 "Так держать с {food}! 🌟 Умный пищевой выбор!",
                 "Фантастика! {food} предлагает отличные питательные преимущества! 💚",
-            ]
-        }
-    }
+            )
+        })
+    })
     
     # General healthy eating compliments
-    GENERAL_COMPLIMENTS = {
-        'en': [
+    GENERAL_COMPLIMENTS = MappingProxyType({
+        'en': (
             "You're making wonderful nutritional choices! 🌟",
             "Your body is getting amazing nutrients from this meal! 💚",
             "Love seeing such thoughtful food choices! ✨",
@@ -183,8 +250,8 @@ class ComplimentService:
             "Your healthy eating habits are inspiring! 🌱",
             "Way to prioritize your wellness through food! 🌈",
             "These nutritious choices will fuel your day perfectly! ⚡",
-        ],
-        'ru': [
+        ),
+        'ru': (
             "Вы делаете замечательный пищевой выбор! 🌟",
             "Ваше тело получает удивительные питательные вещества из этого блюда! 💚",
             "Рад видеть такой обдуманный выбор еды! ✨",
@@ -193,8 +260,35 @@ class ComplimentService:
             "Ваши здоровые пищевые привычки вдохновляют! 🌱",
             "Так держать, приоритет здоровья через питание! 🌈",
             "Эти питательные выборы идеально зарядят ваш день! ⚡",
-        ]
-    }
+        )
+    })
+    
+    # COMPLIMENTS stays the editable source; the split form is what gets filled per response
+    _COMPLIMENT_PARTS = _split_compliment_templates(COMPLIMENTS)
+    
+    # Keywords folded the same way as incoming food names
+    _MATCH_KEYWORDS = _normalized_keywords(HEALTHY_FOODS)
+    # One compiled pattern per category, so each category is a single C-level scan of the name
+    # instead of a Python loop of substring checks. Keywords are laid out as a trie, so shared
+    # prefixes ('black beans'/'black rice', 'семена'/'семена чиа') are compared once.
+    _CATEGORY_PATTERNS = tuple(
+        (category, re.compile(_keyword_trie_pattern(foods)))
+        for category, foods in _MATCH_KEYWORDS.items()
+    )
+    # Whole words that are themselves keywords resolve with one dict lookup, skipping the scan
+    _WORD_CATEGORIES = _single_word_keyword_index(_MATCH_KEYWORDS)
+    # Every keyword of every category in one pattern: a single scan rejects names with no healthy food at all
+    _ANY_KEYWORD_PATTERN = re.compile(_keyword_trie_pattern(
+        [food for foods in _MATCH_KEYWORDS.values() for food in foods]
+    ))
+    # A name sharing no character with any keyword's first letter can't contain a keyword
+    _KEYWORD_FIRST_CHARS = frozenset(food[0] for foods in _MATCH_KEYWORDS.values() for food in foods if food)
+    
+    # Users log the same foods over and over, so classified names are kept in an LRU cache
+    NAME_CACHE_SIZE = 4096
+    
+    def __init__(self):
+        self._cached_categories_for_name = lru_cache(maxsize=self.NAME_CACHE_SIZE)(self._categories_for_name)
     
     def identify_healthy_foods(self, food_items: List[FoodItem]) -> List[tuple]:
         """
@@ -202,19 +296,36 @@ class ComplimentService:
         Returns list of tuples: (food_item, category)
         """
         healthy_items = []
+        # Bound once, outside the per-item loop
+        append = healthy_items.append
+        categories_for_name = self._cached_categories_for_name
         
         for item in food_items:
-            food_name = item.name.lower()
-            
-            # Check each category
-            for category, foods in self.HEALTHY_FOODS.items():
-                for healthy_food in foods:
-                    if healthy_food in food_name:
-                        healthy_items.append((item, category))
-                        break  # Move to next item once we find a match
+            for category in categories_for_name(_normalize_food_text(item.name)):
+                append((item, category))
         
         return healthy_items
     
+    def _categories_for_name(self, food_name: str) -> Tuple[str, ...]:
+        """Return the healthy-food categories matched by a normalized food name, in HEALTHY_FOODS order"""
+        if self._KEYWORD_FIRST_CHARS.isdisjoint(food_name):
+            return ()
+        
+        word_categories = set()
+        for word in food_name.split():
+            word_categories.update(self._WORD_CATEGORIES.get(word, ()))
+        
+        # Most logged items aren't healthy-food keywords at all; one combined scan settles those
+        if not word_categories and not self._ANY_KEYWORD_PATTERN.search(food_name):
+            return ()
+        
+        # An item is listed at most once per category.
+        # A word match is also a substring match, so the regex only runs for categories words missed.
+        return tuple(
+            category for category, pattern in self._CATEGORY_PATTERNS
+            if category in word_categories or pattern.search(food_name)
+        )
+    
     def generate_compliment(self, healthy_items: List[tuple], language: str = 'en') -> Optional[str]:
         """
         Generate a compliment based on identified healthy foods.
@@ -223,17 +334,10 @@ class ComplimentService:
         if not healthy_items:
             return None
         
-        # If multiple healthy items, choose one randomly to compliment
-        if len(healthy_items) > 1:
-            # Prefer specific compliments over general ones
-            item, category = random.choice(healthy_items)
-            compliment = random.choice(self.COMPLIMENTS[language][category])
-            return compliment.format(food=item.name)
-        else:
-            # Single healthy item
-            item, category = healthy_items[0]
-            compliment = random.choice(self.COMPLIMENTS[language][category])
-            return compliment.format(food=item.name)
+        # If multiple healthy items, choose one randomly to compliment; a single item needs no draw
+        item, category = healthy_items[0] if len(healthy_items) == 1 else random.choice(healthy_items)
+        prefix, suffix = random.choice(self._COMPLIMENT_PARTS[language, category])
+        return f"{prefix}{item.name}{suffix}"
     
     def generate_response_with_compliment(self, food_items: List[FoodItem], language: str = 'en') -> Optional[str]:
         """
@@ -2,21 +2,26 @@ from database.database import Database
 from database.models import FoodEntry, FoodItem
 from models.nutrition_models import FoodAnalysisResponse, DailySummary, WeeklySummary
 from datetime import datetime, timedelta
+from operator import attrgetter
 from typing import List, Dict, Optional
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Extracts all per-item nutrition values in one C-level call
+_NUTRITION_VALUES = attrgetter('calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar')
+
 class DatabaseService:
 
     def create_or_update_user(self, telegram_user_id: int, username: str = None, first_name: str = None, timezone: str = None, language: str = None) -> int:
         """Create or update a user in the database."""
-        db = Database(self.db_path)
+        db = self._db
         return db.create_or_update_user(telegram_user_id, username, first_name, timezone, language)
 
     def get_user_by_telegram_id(self, telegram_user_id: int) -> Optional[Dict]:
         """Get user by Telegram user ID (delegates to Database)."""
-        db = Database(self.db_path)
+        db = self._db
         return db.get_user_by_telegram_id(telegram_user_id)
         
     def get_user_language(self, telegram_user_id: int) -> str:
@@ -27,7 +32,7 @@ class DatabaseService:
     def update_user_language(self, telegram_user_id: int, language: str) -> bool:
         """Update user's language preference"""
         try:
-            db = Database(self.db_path)
+            db = self._db
             with db.get_connection() as conn:
                 cursor = conn.execute(
                     "UPDATE users SET language = ? WHERE telegram_user_id = ?",
@@ -40,13 +45,14 @@ class DatabaseService:
 
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # Shared by every method so connections are reused instead of opened per call
+        self._db = Database(db_path)
     
     def store_food_analysis(self, telegram_user_id: int, username: str, first_name: str, 
                             analysis: FoodAnalysisResponse, language: str = None) -> bool:
         """Store food analysis in database"""
-        from database.database import Database
         try:
-            db = Database(self.db_path)
+            db = self._db
             # Defensive: skip DB insert if no food items
             if not analysis.food_items:
                 logger.warning(f"No food items extracted for user {telegram_user_id}, skipping DB insert.")
@@ -54,29 +60,34 @@ class DatabaseService:
             # Create or update user with language
             user_id = db.create_or_update_user(telegram_user_id, username, first_name, language=language)
             # Create food entry
+            total_calories, total_protein, total_carbs, total_fat, total_fiber, total_sugar = _NUTRITION_VALUES(analysis.total_nutrition)
             food_entry = FoodEntry(
                 user_id=user_id,
                 timestamp=analysis.analysis_timestamp,
-                total_calories=analysis.total_nutrition.calories,
-                total_protein=analysis.total_nutrition.protein,
-                total_carbs=analysis.total_nutrition.carbs,
-                total_fat=analysis.total_nutrition.fat,
-                total_fiber=analysis.total_nutrition.fiber,
-                total_sugar=analysis.total_nutrition.sugar,
+                total_calories=total_calories,
+                total_protein=total_protein,
+                total_carbs=total_carbs,
+                total_fat=total_fat,
+                total_fiber=total_fiber,
+                total_sugar=total_sugar,
                 meal_count=len(analysis.food_items)
             )
             # Create food items
             food_items = []
             for item in analysis.food_items:
+                try:
+                    calories, protein, carbs, fat, fiber, sugar = _NUTRITION_VALUES(item.nutrition)
+                except AttributeError:
+                    calories = protein = carbs = fat = fiber = sugar = 0.0
                 food_items.append(FoodItem(
                     name=item.name,
                     quantity=item.quantity,
-                    calories=getattr(item.nutrition, 'calories', 0.0),
-                    protein=getattr(item.nutrition, 'protein', 0.0),
-                    carbs=getattr(item.nutrition, 'carbs', 0.0),
-                    fat=getattr(item.nutrition, 'fat', 0.0),
-                    fiber=getattr(item.nutrition, 'fiber', 0.0),
-                    sugar=getattr(item.nutrition, 'sugar', 0.0),
+                    calories=calories,
+                    protein=protein,
+                    carbs=carbs,
+                    fat=fat,
+                    fiber=fiber,
+                    sugar=sugar,
                     confidence=item.confidence
                 ))
             return db.create_food_entry(food_entry, food_items)
@@ -87,7 +98,7 @@ class DatabaseService:
     def get_daily_summary(self, telegram_user_id: int, date_str: str) -> Optional[DailySummary]:
         """Get daily summary for user"""
         try:
-            db = Database(self.db_path)
+            db = self._db
             user = db.get_user_by_telegram_id(telegram_user_id)
             if not user:
                 return None
@@ -109,11 +120,7 @@ class DatabaseService:
     def get_weekly_data(self, telegram_user_id: int, start_date: str, end_date: str) -> List[Dict]:
         """Get weekly data for user"""
         try:
-            db = Database(self.db_path)
-            user = db.get_user_by_telegram_id(telegram_user_id)
-            if not user:
-                return []
-            return db.get_food_entries_with_items(user['id'], start_date, end_date)
+            return self._db.get_food_entries_with_items_by_telegram_id(telegram_user_id, start_date, end_date)
         except Exception as e:
             logger.error(f"Error getting weekly data: {e}")
             return []
@@ -121,19 +128,9 @@ class DatabaseService:
     def get_all_telegram_user_ids(self) -> List[int]:
         """Get all Telegram user IDs for automated summaries"""
         try:
-            db = Database(self.db_path)
-            user_ids = db.get_all_user_ids()
-            telegram_ids = []
-            for user_id in user_ids:
-                with db.get_connection() as conn:
-                    cursor = conn.execute(
-                        "SELECT telegram_user_id FROM users WHERE id = ?",
-                        (user_id,)
-                    )
-                    row = cursor.fetchone()
-                    if row:
-                        telegram_ids.append(row[0])
-            return telegram_ids
+            with self._db.get_connection() as conn:
+                cursor = conn.execute("SELECT telegram_user_id FROM users ORDER BY id")
+                return [row[0] for row in cursor.fetchall()]
         except Exception as e:
             logger.error(f"Error getting all Telegram user IDs: {e}")
             return []
@@ -141,7 +138,7 @@ class DatabaseService:
     def get_all_users_with_timezones(self) -> List[Dict]:
         """Get all users with their Telegram IDs and timezones"""
         try:
-            db = Database(self.db_path)
+            db = self._db
             with db.get_connection() as conn:
                 cursor = conn.execute("SELECT telegram_user_id, timezone FROM users")
                 return [
@@ -149,4 +146,64 @@ class DatabaseService:
                 ]
         except Exception as e:
             logger.error(f"Error getting all users with timezones: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    def add_pending_daily_batch(self, batch_id: str, summary_date: str, telegram_user_ids: List[int]) -> bool:
+        """Record a submitted daily summary batch and the users it covers"""
+        try:
+            with self._db.get_connection() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO daily_summary_batches (batch_id, summary_date, user_ids) VALUES (?, ?, ?)",
+                    (batch_id, summary_date, json.dumps(telegram_user_ids))
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error recording daily summary batch {batch_id}: {e}")
+            return False
+
+    def get_pending_daily_batches(self) -> List[Dict]:
+        """Get every undelivered daily summary batch, oldest first.
+
+        results is None until the batch's output has been saved, then a dict of
+        telegram_user_id -> insight fields.
+        """
+        try:
+            with self._db.get_connection() as conn:
+                cursor = conn.execute(
+                    "SELECT batch_id, summary_date, user_ids, results FROM daily_summary_batches ORDER BY created_at"
+                )
+                return [
+                    {
+                        'batch_id': row[0],
+                        'summary_date': row[1],
+                        'user_ids': json.loads(row[2]),
+                        'results': {int(user_id): fields for user_id, fields in json.loads(row[3]).items()} if row[3] else None
+                    }
+                    for row in cursor.fetchall()
+                ]
+        except Exception as e:
+            logger.error(f"Error getting pending daily summary batches: {e}")
+            return []
+
+    def save_daily_batch_results(self, batch_id: str, results: Dict[int, Dict]) -> bool:
+        """Store a finished batch's summaries (telegram_user_id -> insight fields) until they are sent"""
+        try:
+            with self._db.get_connection() as conn:
+                conn.execute(
+                    "UPDATE daily_summary_batches SET results = ? WHERE batch_id = ?",
+                    (json.dumps(results, ensure_ascii=False), batch_id)
+                )
+            return True
+        except Exception as e:
+            logger.error(f"Error saving results of daily summary batch {batch_id}: {e}")
+            return False
+
+    def delete_daily_batch(self, batch_id: str) -> bool:
+        """Forget a daily summary batch once its summaries have been sent"""
+        try:
+            with self._db.get_connection() as conn:
+                conn.execute("DELETE FROM daily_summary_batches WHERE batch_id = ?", (batch_id,))
+            return True
+        except Exception as e:
+            logger.error(f"Error deleting daily summary batch {batch_id}: {e}")
+            return False
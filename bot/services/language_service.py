@@ -4,14 +4,63 @@ Supports English and Russian.
 """
 import re
 import logging
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Optional, Dict, List
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Cyrillic letters as counted by detection (the basic Cyrillic block); written with escapes so the
+# pattern doesn't depend on the source file's encoding surviving intact
+_CYRILLIC_PATTERN = re.compile(r'[\u0400-\u047F]')
+_LATIN_LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+# The basic Cyrillic block (U+0400-U+047F), which covers the Russian alphabet
+_CYRILLIC_LETTERS = ''.join(map(chr, range(0x0400, 0x0480)))
+# Maps every Latin letter to 'l' and every Cyrillic letter to 'c'; other characters pass through unchanged,
+# and since 'l' and 'c' are themselves Latin letters, counting them afterwards is exact
+_SCRIPT_TABLE = str.maketrans({
+    **dict.fromkeys(_LATIN_LETTERS, 'l'),
+    **dict.fromkeys(_CYRILLIC_LETTERS, 'c'),
+})
+# Every byte value except the ASCII Latin letters, for counting those letters in encoded text
+_NON_LATIN_BYTES = bytes(range(256)).translate(None, _LATIN_LETTERS.encode('ascii'))
+
+# Texts longer than this are classified on their UTF-8 bytes instead of through the translate table
+_BYTE_COUNT_MIN_TEXT_LENGTH = 256
+
+# Texts longer than this are detected without caching, so the cache can't pin large messages in memory
+_DETECT_CACHE_MAX_TEXT_LENGTH = 512
+
+
+def _detect_language(text: str) -> str:
+    """Return 'ru' if more than 30% of the letters in a non-blank text are Cyrillic, else 'en'"""
+    if len(text) > _BYTE_COUNT_MIN_TEXT_LENGTH:
+        # In UTF-8 every basic Cyrillic character has lead byte 0xD0 or 0xD1 (never a continuation byte)
+        # and Latin letters stay single ASCII bytes, so bytes.count/translate count both in fast C loops
+        encoded = text.encode('utf-8', 'surrogatepass')
+        cyrillic_chars = encoded.count(b'\xd0') + encoded.count(b'\xd1')
+        total_letters = cyrillic_chars + len(encoded.translate(None, _NON_LATIN_BYTES))
+    else:
+        # Classify every character with one C-level table lookup, then count the two classes
+        scripts = text.translate(_SCRIPT_TABLE)
+        cyrillic_chars = scripts.count('c')
+        total_letters = cyrillic_chars + scripts.count('l')
+    
+    if total_letters == 0:
+        return 'en'  # Default to English if no letters
+    
+    # If more than 30% of letters are Cyrillic, consider it Russian
+    cyrillic_ratio = cyrillic_chars / total_letters
+    return 'ru' if cyrillic_ratio > 0.3 else 'en'
+
+
+# Commands, button labels and common phrases repeat constantly, so their detection result is reused
+_detect_language_cached = lru_cache(maxsize=2048)(_detect_language)
+
+@dataclass(frozen=True, slots=True)
 class LocalizedMessages:
-    """Container for localized message templates"""
+    """Container for localized message templates (immutable, slotted for fast field reads)"""
     
     # Analysis messages
     food_analysis_complete: str
@@ -54,46 +103,88 @@ class LocalizedMessages:
     pending_clarification_status: str
 
 
-class LanguageService:
-    """Service for language detection and localization"""
-    
-    # Russian alphabet pattern for detection
-    CYRILLIC_PATTERN = re.compile(r'[а-яё]', re.IGNORECASE)
-    
-    # Localized messages
-    MESSAGES = {
-        'en': LocalizedMessages(
-            # Analysis messages
-            food_analysis_complete="🍽️ **Food Analysis Complete!**\n\n",
-            clarification_processed="✅ **Clarification processed! Final Food Analysis:**\n\n",
-            analyzing_food="🔍 Analyzing your food... This may take a moment.",
-            analyzing_audio="🎤 Analyzing your audio... This may take a moment.",
-            analyzing_text="📝 Analyzing your food description... This may take a moment.",
-            processing_clarification="🔍 Processing your clarification... This may take a moment.",
-            
-            # Nutrition labels
-            calories="Calories",
-            protein="Protein", 
-            carbs="Carbs",
-            fat="Fat",
-            total_nutrition="**📊 Total Nutrition:**\n",
-            
-            # Error messages
-            unauthorized="🚫 You are not authorized to use this bot.",
-            analysis_failed="❌ Could not analyze the food. Please try with a clearer photo or more detailed description.",
-            error_occurred="❌ An error occurred while analyzing your food. Please try again.",
-            failed_to_save="❌ Failed to save food entry. Please try again.",
-            
-            # Clarification messages
-            uncertainty_detected="⚠️ I have some uncertainties about your food:\n\n",
-            uncertain_items="**Uncertain items:**\n",
-            uncertainty_reasons="**Reasons for uncertainty:**\n",
-            clarification_request="Please send another photo, voice message, or text description with clarification so I can provide accurate nutrition information!",
-            clarification_cancelled="✅ Clarification request cancelled. You can now send new food photos, voice messages, or text descriptions.",
-            no_pending_clarification="ℹ️ No pending clarification to cancel.",
-            
-            # Commands and help
-            welcome_message="""🍽️ **Welcome to AI Food Journal Bot!**
+def _escape_format_braces(text: str) -> str:
+    """Escape literal braces so the text can be embedded in a str.format template"""
+    return text.replace('{', '{{').replace('}', '}}')
+
+
+def _food_item_template(messages: LocalizedMessages):
+    """Build the bound format method for one food item line block, with the localized labels baked in"""
+    calories, protein, carbs, fat = map(
+        _escape_format_braces, (messages.calories, messages.protein, messages.carbs, messages.fat)
+    )
+    return (
+        "📍 **{}** ({})\n"
+        f"   • {calories}: {{:.0f}} kcal\n"
+        f"   • {protein}: {{:.1f}}g\n"
+        f"   • {carbs}: {{:.1f}}g\n"
+        f"   • {fat}: {{:.1f}}g\n\n"
+    ).format
+
+
+def _description_line_templates(messages: LocalizedMessages) -> tuple:
+    """Build the description line template for every (is_clarification, is_audio, is_text) bit key
+
+    Audio descriptions are shown as a transcription, clarification and text descriptions as the
+    original description; None means the description is not shown.
+    """
+    transcription = f"{_escape_format_braces(messages.transcription)} \"{{}}\"\n\n".format
+    original_description = f"{_escape_format_braces(messages.original_description)} \"{{}}\"\n\n".format
+    return tuple(
+        transcription if key & 0b010 else original_description if key & 0b101 else None
+        for key in range(8)
+    )
+
+
+def _total_nutrition_template(messages: LocalizedMessages):
+    """Build the bound format method for the total nutrition block, header and labels included"""
+    header, calories, protein, carbs, fat = map(
+        _escape_format_braces,
+        (messages.total_nutrition, messages.calories, messages.protein, messages.carbs, messages.fat)
+    )
+    return (
+        f"{header}"
+        f"🔥 {calories}: {{:.0f}} kcal\n"
+        f"💪 {protein}: {{:.1f}}g\n"
+        f"🌾 {carbs}: {{:.1f}}g\n"
+        f"🥑 {fat}: {{:.1f}}g"
+    ).format
+
+
+# Localized messages (read-only)
+_MESSAGES = MappingProxyType({
+    'en': LocalizedMessages(
+        # Analysis messages
+        food_analysis_complete="🍽️ **Food Analysis Complete!**\n\n",
+        clarification_processed="✅ **Clarification processed! Final Food Analysis:**\n\n",
+        analyzing_food="🔍 Analyzing your food... This may take a moment.",
+        analyzing_audio="🎤 Analyzing your audio... This may take a moment.",
+        analyzing_text="📝 Analyzing your food description... This may take a moment.",
+        processing_clarification="🔍 Processing your clarification... This may take a moment.",
+        
+        # Nutrition labels
+        calories="Calories",
+        protein="Protein", 
+        carbs="Carbs",
+        fat="Fat",
+        total_nutrition="**📊 Total Nutrition:**\n",
+        
+        # Error messages
+        unauthorized="🚫 You are not authorized to use this bot.",
+        analysis_failed="❌ Could not analyze the food. Please try with a clearer photo or more detailed description.",
+        error_occurred="❌ An error occurred while analyzing your food. Please try again.",
+        failed_to_save="❌ Failed to save food entry. Please try again.",
+        
+        # Clarification messages
+        uncertainty_detected="⚠️ I have some uncertainties about your food:\n\n",
+        uncertain_items="**Uncertain items:**\n",
+        uncertainty_reasons="**Reasons for uncertainty:**\n",
+        clarification_request="Please send another photo, voice message, or text description with clarification so I can provide accurate nutrition information!",
+        clarification_cancelled="✅ Clarification request cancelled. You can now send new food photos, voice messages, or text descriptions.",
+        no_pending_clarification="ℹ️ No pending clarification to cancel.",
+        
+        # Commands and help
+        welcome_message="""🍽️ **Welcome to AI Food Journal Bot!**
 
 📸 **Send me a photo of your food** and I'll analyze it for you!
 🎤 **Send me a voice message** describing what you ate!
@@ -109,14 +200,14 @@ class LanguageService:
 /help - Show this help message
 
 **🤖 AI-Powered Features:**
-🌙 **Smart Daily Summaries** - Delivered at 9 PM with personalized insights
+🌙 **Smart Daily Summaries** - Delivered between 9 and 10 PM with personalized insights
 📊 **Weekly AI Analysis** - Comprehensive reports every Sunday at 8 PM
 💡 **Personalized Recommendations** - Based on your actual eating patterns
 🧠 **Smart Clarification** - I'll ask for clarification when uncertain about your food
 
 Just send a food photo, voice message, or text description to get started! 🚀""",
-            
-            help_message="""🤖 **AI Food Journal Bot Help**
+        
+        help_message="""🤖 **AI Food Journal Bot Help**
 
 **How to use:**
 1. 📸 Send a photo of your food OR 🎤 Send a voice message OR 📝 Send a text message describing it
@@ -145,7 +236,7 @@ Just send a food photo, voice message, or text description to get started! 🚀"
 • Speak clearly when recording voice messages
 • Be specific about quantities and ingredients in text descriptions""",
 
-            language_help_message="""🌍 **Language Settings**
+        language_help_message="""🌍 **Language Settings**
 
 To change your language preference, use:
 /setlanguage en (for English)
@@ -155,46 +246,46 @@ Example: `/setlanguage ru`
 
 The bot will automatically detect language from your messages, but you can set a preference with this command.""",
 
-            language_set_message="✅ **Language preference updated!** I'll now respond in English by default.",
-            
-            # Status messages
-            transcription="🎤 **Transcription:**",
-            original_description="📝 **Original Description:**",
-            pending_clarification_status="⏳ **You have a pending clarification request:**\n\n",
-        ),
+        language_set_message="✅ **Language preference updated!** I'll now respond in English by default.",
+        
+        # Status messages
+        transcription="🎤 **Transcription:**",
+        original_description="📝 **Original Description:**",
+        pending_clarification_status="⏳ **You have a pending clarification request:**\n\n",
+    ),
+    
+    'ru': LocalizedMessages(
+        # Analysis messages
+        food_analysis_complete="🍽️ **Анализ пищи завершён!**\n\n",
+        clarification_processed="✅ **Уточнение обработано! Финальный анализ пищи:**\n\n",
+        analyzing_food="🔍 Анализирую вашу еду... Это может занять несколько минут.",
+        analyzing_audio="🎤 Анализирую ваше аудио... Это может занять несколько минут.",
+        analyzing_text="📝 Анализирую описание вашей еды... Это может занять несколько минут.",
+        processing_clarification="🔍 Обрабатываю ваше уточнение... Это может занять несколько минут.",
+        
+        # Nutrition labels
+        calories="Калории",
+        protein="Белки",
+        carbs="Углеводы", 
+        fat="Жиры",
+        total_nutrition="**📊 Общая питательность:**\n",
+        
+        # Error messages
+        unauthorized="🚫 У вас нет доступа к этому боту.",
+        analysis_failed="❌ Не удалось проанализировать еду. Пожалуйста, попробуйте с более чётким фото или подробным описанием.",
+        error_occurred="❌ Произошла ошибка при анализе вашей еды. Пожалуйста, попробуйте снова.",
+        failed_to_save="❌ Не удалось сохранить запись о еде. Пожалуйста, попробуйте снова.",
+        
+        # Clarification messages
+        uncertainty_detected="⚠️ У меня есть некоторые неопределённости относительно вашей еды:\n\n",
+        uncertain_items="**Неопределённые продукты:**\n",
+        uncertainty_reasons="**Причины неопределённости:**\n",
+        clarification_request="Пожалуйста, отправьте другое фото, голосовое сообщение или текстовое описание с уточнениями, чтобы я мог предоставить точную информацию о питательности!",
+        clarification_cancelled="✅ Запрос на уточнение отменён. Теперь вы можете отправлять новые фото еды, голосовые сообщения или текстовые описания.",
+        no_pending_clarification="ℹ️ Нет ожидающих уточнений для отмены.",
         
-        'ru': LocalizedMessages(
-            # Analysis messages
-            food_analysis_complete="🍽️ **Анализ пищи завершён!**\n\n",
-            clarification_processed="✅ **Уточнение обработано! Финальный анализ пищи:**\n\n",
-            analyzing_food="🔍 Анализирую вашу еду... Это может занять несколько минут.",
-            analyzing_audio="🎤 Анализирую ваше аудио... Это может занять несколько минут.",
-            analyzing_text="📝 Анализирую описание вашей еды... Это может занять несколько минут.",
-            processing_clarification="🔍 Обрабатываю ваше уточнение... Это может занять несколько минут.",
-            
-            # Nutrition labels
-            calories="Калории",
-            protein="Белки",
-            carbs="Углеводы", 
-            fat="Жиры",
-            total_nutrition="**📊 Общая питательность:**\n",
-            
-            # Error messages
-            unauthorized="🚫 У вас нет доступа к этому боту.",
-            analysis_failed="❌ Не удалось проанализировать еду. Пожалуйста, попробуйте с более чётким фото или подробным описанием.",
-            error_occurred="❌ Произошла ошибка при анализе вашей еды. Пожалуйста, попробуйте снова.",
-            failed_to_save="❌ Не удалось сохранить запись о еде. Пожалуйста, попробуйте снова.",
-            
-            # Clarification messages
-            uncertainty_detected="⚠️ У меня есть некоторые неопределённости относительно вашей еды:\n\n",
-            uncertain_items="**Неопределённые продукты:**\n",
-            uncertainty_reasons="**Причины неопределённости:**\n",
-            clarification_request="Пожалуйста, отправьте другое фото, голосовое сообщение или текстовое описание с уточнениями, чтобы я мог предоставить точную информацию о питательности!",
-            clarification_cancelled="✅ Запрос на уточнение отменён. Теперь вы можете отправлять новые фото еды, голосовые сообщения или текстовые описания.",
-            no_pending_clarification="ℹ️ Нет ожидающих уточнений для отмены.",
-            
-            # Commands and help
-            welcome_message="""🍽️ **Добро пожаловать в ИИ Бот Дневника Питания!**
+        # Commands and help
+        welcome_message="""🍽️ **Добро пожаловать в ИИ Бот Дневника Питания!**
 
 📸 **Отправьте мне фото вашей еды**, и я проанализирую её для вас!
 🎤 **Отправьте мне голосовое сообщение**, описывающее что вы ели!
@@ -210,14 +301,14 @@ The bot will automatically detect language from your messages, but you can set a
 /help - Показать это сообщение помощи
 
 **🤖 ИИ-функции:**
-🌙 **Умные ежедневные сводки** - Доставляются в 21:00 с персонализированными инсайтами
+🌙 **Умные ежедневные сводки** - Доставляются с 21:00 до 22:00 с персонализированными инсайтами
 📊 **Еженедельный ИИ-анализ** - Комплексные отчёты каждое воскресенье в 20:00
 💡 **Персонализированные рекомендации** - На основе ваших реальных привычек питания
 🧠 **Умные уточнения** - Я попрошу уточнения, когда не уверен в вашей еде
 
 Просто отправьте фото еды, голосовое сообщение или текстовое описание, чтобы начать! 🚀""",
-            
-            help_message="""🤖 **Помощь по ИИ Боту Дневника Питания**
+        
+        help_message="""🤖 **Помощь по ИИ Боту Дневника Питания**
 
 **Как использовать:**
 1. 📸 Отправьте фото вашей еды ИЛИ 🎤 голосовое сообщение ИЛИ 📝 текстовое описание
@@ -246,7 +337,7 @@ The bot will automatically detect language from your messages, but you can set a
 • Говорите чётко при записи голосовых сообщений
 • Будьте конкретны в количествах и ингредиентах в текстовых описаниях""",
 
-            language_help_message="""🌍 **Настройки языка**
+        language_help_message="""🌍 **Настройки языка**
 
 Чтобы изменить языковые предпочтения, используйте:
 /setlanguage en (для английского)
@@ -256,114 +347,139 @@ The bot will automatically detect language from your messages, but you can set a
 
 Бот автоматически определяет язык из ваших сообщений, но вы можете установить предпочтение этой командой.""",
 
-            language_set_message="✅ **Языковые предпочтения обновлены!** Теперь я буду отвечать на русском языке по умолчанию.",
-            
-            # Status messages
-            transcription="🎤 **Расшифровка:**",
-            original_description="📝 **Исходное описание:**",
-            pending_clarification_status="⏳ **У вас есть ожидающий запрос на уточнение:**\n\n",
-        )
-    }
+        language_set_message="✅ **Языковые предпочтения обновлены!** Теперь я буду отвечать на русском языке по умолчанию.",
+        
+        # Status messages
+        transcription="🎤 **Расшифровка:**",
+        original_description="📝 **Исходное описание:**",
+        pending_clarification_status="⏳ **У вас есть ожидающий запрос на уточнение:**\n\n",
+    )
+})
+# Fallback for unsupported languages, bound once
+_EN = _MESSAGES['en']
+
+
+class LanguageService:
+    """Service for language detection and localization"""
+    
+    # Russian alphabet pattern for detection
+    CYRILLIC_PATTERN = _CYRILLIC_PATTERN
+    
+    # Localized messages (module-level table, aliased for existing callers)
+    MESSAGES = _MESSAGES
     
-    def detect_language(self, text: str) -> str:
+    # Per-language food item and total nutrition templates, built once from MESSAGES
+    _FOOD_ITEM_TEMPLATES = {language: _food_item_template(messages) for language, messages in _MESSAGES.items()}
+    _TOTAL_NUTRITION_TEMPLATES = {language: _total_nutrition_template(messages) for language, messages in _MESSAGES.items()}
+    # Indexed by (is_clarification << 2) | (is_audio << 1) | is_text
+    _DESCRIPTION_LINE_TEMPLATES = {language: _description_line_templates(messages) for language, messages in _MESSAGES.items()}
+    
+    # Users re-send the same descriptions, so rendered nutrition responses are kept in an LRU cache
+    RESPONSE_CACHE_SIZE = 256
+    # Longer descriptions are rarely repeated and would only bloat the cache keys
+    RESPONSE_CACHE_MAX_DESCRIPTION_LENGTH = 256
+    
+    def __init__(self):
+        self._cached_render_nutrition_response = lru_cache(maxsize=self.RESPONSE_CACHE_SIZE)(self._render_nutrition_response)
+    
+    @staticmethod
+    def detect_language(text: str, _detect=_detect_language, _detect_cached=_detect_language_cached,
+                        _max_cached_length=_DETECT_CACHE_MAX_TEXT_LENGTH) -> str:
         """
         Detect language from text input.
         Returns 'ru' for Russian, 'en' for English (default).
+        The underscore parameters pre-bind module globals as fast locals and are not meant to be passed.
         """
-        if not text or not text.strip():
-            return 'en'  # Default to English
-        
-        # Count Cyrillic characters
-        cyrillic_chars = len(self.CYRILLIC_PATTERN.findall(text))
-        total_letters = len(re.findall(r'[a-zA-Zа-яёА-ЯЁ]', text))
-        
-        if total_letters == 0:
-            return 'en'  # Default to English if no letters
+        # Empty and pure-ASCII text (no Cyrillic possible) default to English; CPython answers
+        # isascii() from a flag on the string in O(1). Non-ASCII blank text has no letters, so
+        # the counting below also returns 'en' for it
+        if not text or text.isascii():
+            return 'en'
         
-        # If more than 30% of letters are Cyrillic, consider it Russian
-        cyrillic_ratio = cyrillic_chars / total_letters
-        return 'ru' if cyrillic_ratio > 0.3 else 'en'
+        if len(text) > _max_cached_length:
+            return _detect(text)
+        return _detect_cached(text)
     
-    def get_messages(self, language: str) -> LocalizedMessages:
-        """Get localized messages for the specified language"""
-        return self.MESSAGES.get(language, self.MESSAGES['en'])
+    @staticmethod
+    def get_messages(language: str, _messages=_MESSAGES, _fallback=_EN) -> LocalizedMessages:
+        """Get localized messages for the specified language (English for unsupported ones)"""
+        return _messages.get(language, _fallback)
     
     def format_nutrition_response(self, language: str, analysis, description: str = None, 
                                 is_clarification: bool = False, is_audio: bool = False, 
                                 is_text: bool = False) -> str:
         """Format the nutrition response in the specified language"""
+        # NutritionInfo defaults every field to 0.0, so no getattr fallbacks are needed
+        items = tuple(
+            (item.name, item.quantity, item.nutrition.calories, item.nutrition.protein, item.nutrition.carbs, item.nutrition.fat)
+            for item in analysis.food_items
+        )
+        total = analysis.total_nutrition
+        fingerprint = (
+            language, description, is_clarification, is_audio, is_text,
+            items, (total.calories, total.protein, total.carbs, total.fat)
+        )
+        if description and len(description) > self.RESPONSE_CACHE_MAX_DESCRIPTION_LENGTH:
+            return self._render_nutrition_response(*fingerprint)
+        return self._cached_render_nutrition_response(*fingerprint)
+    
+    def _render_nutrition_response(self, language: str, description: Optional[str], is_clarification: bool,
+                                   is_audio: bool, is_text: bool, items: tuple, total: tuple) -> str:
+        """Render a nutrition response from plain item and total values"""
         messages = self.get_messages(language)
         
         # Build response message
-        if is_clarification:
-            if description:
-                if is_audio:
-                    response = f"{messages.transcription} \"{description}\"\n\n"
-                else:
-                    response = f"{messages.original_description} \"{description}\"\n\n"
-            else:
-                response = ""
-            response += messages.clarification_processed
-        else:
-            if description:
-                if is_audio:
-                    response = f"{messages.transcription} \"{description}\"\n\n"
-                elif is_text:
-                    response = f"{messages.original_description} \"{description}\"\n\n"
-                else:
-                    response = ""
-            else:
-                response = ""
-            response += messages.food_analysis_complete
+        parts = []
+        if description:
+            description_lines = self._DESCRIPTION_LINE_TEMPLATES.get(language, self._DESCRIPTION_LINE_TEMPLATES['en'])
+            description_line = description_lines[(is_clarification << 2) | (is_audio << 1) | is_text]
+            if description_line:
+                parts.append(description_line(description))
+        parts.append(messages.clarification_processed if is_clarification else messages.food_analysis_complete)
         
         # Add food items
-        for item in analysis.food_items:
-            response += f"📍 **{item.name}** ({item.quantity})\n"
-            response += f"   • {messages.calories}: {getattr(item.nutrition, 'calories', 0.0):.0f} kcal\n"
-            response += f"   • {messages.protein}: {getattr(item.nutrition, 'protein', 0.0):.1f}g\n"
-            response += f"   • {messages.carbs}: {getattr(item.nutrition, 'carbs', 0.0):.1f}g\n"
-            response += f"   • {messages.fat}: {getattr(item.nutrition, 'fat', 0.0):.1f}g\n\n"
+        food_item_line = self._FOOD_ITEM_TEMPLATES.get(language, self._FOOD_ITEM_TEMPLATES['en'])
+        parts.extend(food_item_line(*item) for item in items)
         
         # Add total nutrition
-        response += messages.total_nutrition
-        response += f"🔥 {messages.calories}: {analysis.total_nutrition.calories:.0f} kcal\n"
-        response += f"💪 {messages.protein}: {analysis.total_nutrition.protein:.1f}g\n"
-        response += f"🌾 {messages.carbs}: {analysis.total_nutrition.carbs:.1f}g\n"
-        response += f"🥑 {messages.fat}: {analysis.total_nutrition.fat:.1f}g"
+        total_nutrition_block = self._TOTAL_NUTRITION_TEMPLATES.get(language, self._TOTAL_NUTRITION_TEMPLATES['en'])
+        parts.append(total_nutrition_block(*total))
         
-        return response
+        return "".join(parts)
     
     def format_clarification_request(self, language: str, analysis, description: str = None,
                                    is_audio: bool = False, is_text: bool = False) -> str:
         """Format clarification request in the specified language"""
         messages = self.get_messages(language)
         
-        clarification_msg = ""
+        parts = []
         
         # Add original description if available
         if description:
-            if is_audio:
-                clarification_msg += f"{messages.transcription} \"{description}\"\n\n"
-            elif is_text:
-                clarification_msg += f"{messages.original_description} \"{description}\"\n\n"
+            description_lines = self._DESCRIPTION_LINE_TEMPLATES.get(language, self._DESCRIPTION_LINE_TEMPLATES['en'])
+            description_line = description_lines[(is_audio << 1) | is_text]
+            if description_line:
+                parts.append(description_line(description))
         
-        clarification_msg += messages.uncertainty_detected
+        parts.append(messages.uncertainty_detected)
         
-        if analysis.uncertainty.uncertain_items:
-            clarification_msg += messages.uncertain_items
-            for item in analysis.uncertainty.uncertain_items:
-                clarification_msg += f"• {item}\n"
-            clarification_msg += "\n"
+        # Bullet lists are built with a single join per list instead of an f-string per entry
+        uncertainty = analysis.uncertainty
+        if uncertainty.uncertain_items:
+            parts.append(messages.uncertain_items)
+            parts.append("• ")
+            parts.append("\n• ".join(uncertainty.uncertain_items))
+            parts.append("\n\n")
         
-        if analysis.uncertainty.uncertainty_reasons:
-            clarification_msg += messages.uncertainty_reasons
-            for reason in analysis.uncertainty.uncertainty_reasons:
-                clarification_msg += f"• {reason}\n"
-            clarification_msg += "\n"
+        if uncertainty.uncertainty_reasons:
+            parts.append(messages.uncertainty_reasons)
+            parts.append("• ")
+            parts.append("\n• ".join(uncertainty.uncertainty_reasons))
+            parts.append("\n\n")
         
-        clarification_msg += messages.clarification_request
+        parts.append(messages.clarification_request)
         
-        return clarification_msg
+        return "".join(parts)
 
 
 # Global language service instance
@@ -1,26 +1,87 @@
 import asyncio
-from datetime import datetime, timedelta, time as dt_time
+from datetime import date, datetime, timedelta, time as dt_time
 import pytz
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-from services.ai_summary_service import AISummaryService
+from services.ai_summary_service import AISummaryService, DailyInsight, WeeklyInsight
 from services.database_service import DatabaseService
 from telegram import Bot
+from telegram.constants import ParseMode
+from telegram.error import RetryAfter, TimedOut
 import os
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
+_DAILY_SUMMARY_SECTIONS = (
+    ("🔍 **Key Observations:**\n", 'key_observations'),
+    ("⭐ **Nutrition Highlights:**\n", 'nutrition_highlights'),
+    ("💡 **Recommendations for Tomorrow:**\n", 'recommendations'),
+)
+_WEEKLY_SUMMARY_SECTIONS = (
+    ("📈 **Trends Analysis:**\n", 'trends_analysis'),
+    ("🏆 **This Week's Achievements:**\n", 'achievements'),
+    ("🎯 **Areas for Improvement:**\n", 'areas_for_improvement'),
+    ("💡 **Personalized Recommendations:**\n", 'personalized_recommendations'),
+    ("🚀 **Goals for Next Week:**\n", 'next_week_goals'),
+)
+
+
+def _append_bullet_sections(parts: List[str], insight, sections: Tuple[Tuple[str, str], ...]):
+    """Append each non-empty list field of the insight as a titled bullet list"""
+    for title, field in sections:
+        entries = getattr(insight, field)
+        if entries:
+            parts.append(title)
+            parts.append("• ")
+            parts.append("\n• ".join(entries))
+            parts.append("\n\n")
+
+
+def _render_daily_summary(header: str, ai_summary: DailyInsight) -> str:
+    """Render a scheduled daily summary message below the given header"""
+    parts = [header, "📋 **Summary:**\n", ai_summary.summary, "\n\n"]
+    _append_bullet_sections(parts, ai_summary, _DAILY_SUMMARY_SECTIONS)
+    parts.append(f"🌟 **{ai_summary.motivational_message}**")
+    return "".join(parts)
+
+
+def _render_weekly_summary(ai_summary: WeeklyInsight) -> str:
+    """Render a scheduled weekly summary message"""
+    parts = ["📊 **AI Weekly Nutrition Analysis**\n\n📝 **Weekly Summary:**\n", ai_summary.summary, "\n\n"]
+    _append_bullet_sections(parts, ai_summary, _WEEKLY_SUMMARY_SECTIONS)
+    parts.append("Keep up the fantastic work! 🌟")
+    return "".join(parts)
+
+
 class AutomatedSummaryService:
+    # Telegram allows a bot about 30 messages per second, so broadcasts start at most this many per second
+    BROADCAST_MESSAGES_PER_SECOND = 25
+    # User lists are reused for a few minutes, so the every-minute reminder check doesn't rescan the users table
+    USER_LIST_CACHE_TTL_SECONDS = 5 * 60
+    # Attempts per scheduled message when Telegram asks us to back off or the request times out
+    SEND_ATTEMPTS = 3
+    # Nightly summaries still waiting on the Batch API by this time are generated in real time instead
+    DAILY_BATCH_DEADLINE = dt_time(22, 0)
+
     def __init__(self, bot: Bot, database_service: DatabaseService, ai_summary_service: AISummaryService):
+        # Broadcasts keep up to BROADCAST_MESSAGES_PER_SECOND sends in flight, so the bot needs a connection
+        # pool at least that large: pass application.bot (pool of 256), not a bare Bot(token) (pool of 1)
         self.bot = bot
         self.database_service = database_service
         self.ai_summary_service = ai_summary_service
-        self.scheduler = AsyncIOScheduler()
+        # A run delayed by a busy event loop or a blocked thread still fires within the hour, and a
+        # backlog of the same job collapses into one run instead of repeated broadcasts
+        self.scheduler = AsyncIOScheduler(job_defaults={'misfire_grace_time': 60 * 60, 'coalesce': True})
+        # (fetched_at, users) for the Telegram ID and timezone user lists
+        self._user_ids_cache: Optional[Tuple[float, List[int]]] = None
+        self._users_with_timezones_cache: Optional[Tuple[float, List[Dict]]] = None
         
     def start_scheduler(self):
         """Start the automated AI summary scheduler"""
-        # Daily AI summary at 9 PM every day
+        # Daily AI summaries are queued at 9 PM every day and delivered by DAILY_BATCH_DEADLINE (10 PM)
         self.scheduler.add_job(
             self.send_daily_ai_summaries,
             CronTrigger(hour=21, minute=0),  # 9:00 PM
@@ -28,6 +89,16 @@ class AutomatedSummaryService:
             replace_existing=True
         )
 
+        # Check submitted daily summary batches for results every 5 minutes. Pending batches are
+        # stored in the database, so the first check runs right away to pick up any left by a restart
+        self.scheduler.add_job(
+            self.deliver_batched_daily_summaries,
+            CronTrigger(minute='*/5'),
+            id='daily_ai_summary_delivery',
+            replace_existing=True,
+            next_run_time=datetime.now()
+        )
+
         # Weekly AI summary on Sundays at 8 PM
         self.scheduler.add_job(
             self.send_weekly_ai_summaries,
@@ -36,27 +107,84 @@ class AutomatedSummaryService:
             replace_existing=True
         )
 
-        # Per-user timezone-aware reminders: check every minute
+        # Per-user timezone-aware reminders: one job for all users and reminder times. Every real UTC
+        # offset is a multiple of 15 minutes, so local hh:00 always falls on a quarter hour in UTC
         self.scheduler.add_job(
             self.send_food_reminders_timezone_aware,
-            CronTrigger(minute='*'),
+            CronTrigger(minute='0,15,30,45'),
             id='food_reminder_timezone_aware',
             replace_existing=True
         )
 
         self.scheduler.start()
         logger.info("Automated AI summary scheduler started")
+
+    async def _get_user_ids(self) -> List[int]:
+        """Get every user's Telegram ID, reusing a recent lookup"""
+        now = time.monotonic()
+        if self._user_ids_cache and now - self._user_ids_cache[0] < self.USER_LIST_CACHE_TTL_SECONDS:
+            return self._user_ids_cache[1]
+        # SQLite access is blocking, so it runs in a worker thread to keep the event loop free
+        user_ids = await asyncio.to_thread(self.database_service.get_all_telegram_user_ids)
+        # An empty list may be a failed query, so it isn't cached
+        if user_ids:
+            self._user_ids_cache = (now, user_ids)
+        return user_ids
+
+    async def _get_users_with_timezones(self) -> List[Dict]:
+        """Get every user's Telegram ID and timezone, reusing a recent lookup"""
+        now = time.monotonic()
+        if self._users_with_timezones_cache and now - self._users_with_timezones_cache[0] < self.USER_LIST_CACHE_TTL_SECONDS:
+            return self._users_with_timezones_cache[1]
+        users = await asyncio.to_thread(self.database_service.get_all_users_with_timezones)
+        if users:
+            self._users_with_timezones_cache = (now, users)
+        return users
+
+    async def _send_message(self, chat_id: int, text: str):
+        """Send a Markdown message, waiting exactly as long as Telegram asks on flood control"""
+        for attempt in range(1, self.SEND_ATTEMPTS + 1):
+            try:
+                await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=ParseMode.MARKDOWN)
+                return
+            except RetryAfter as e:
+                if attempt == self.SEND_ATTEMPTS:
+                    raise
+                logger.warning(f"Flood control for chat {chat_id}, retrying in {e.retry_after}s")
+                await asyncio.sleep(e.retry_after)
+            except TimedOut:
+                if attempt == self.SEND_ATTEMPTS:
+                    raise
+                await asyncio.sleep(1)
+
+    async def _broadcast(self, user_ids: Iterable[int], send_one: Callable[[int], Awaitable[None]]):
+        """Run send_one for every user concurrently, rate-limited for Telegram
+
+        send_one is expected to handle and log its own errors.
+        """
+        semaphore = asyncio.Semaphore(self.BROADCAST_MESSAGES_PER_SECOND)
+
+        async def send(user_id: int):
+            async with semaphore:
+                # Each send keeps its slot for at least a second, which caps the start rate as well as concurrency
+                await asyncio.gather(send_one(user_id), asyncio.sleep(1))
+
+        await asyncio.gather(*(send(user_id) for user_id in user_ids), return_exceptions=True)
+
     async def send_food_reminders_timezone_aware(self):
         """Send food reminders at 10:00, 15:00, and 20:00 in each user's local timezone."""
         try:
             reminder_times = [dt_time(10, 0), dt_time(15, 0), dt_time(20, 0)]
-            users = self.database_service.get_all_users_with_timezones()
-            now_utc = datetime.now(datetime.timezone.utc).replace(second=0, microsecond=0)
+            users = await self._get_users_with_timezones()
+            now_utc = datetime.now(pytz.UTC)
+            # Runs are scheduled on quarter hours, so a run that starts late is matched against the slot it was due in
+            now_utc = now_utc.replace(minute=now_utc.minute - now_utc.minute % 15, second=0, microsecond=0)
             reminder_message = (
                 "⏰ **Don't forget to track your food!**\n\n"
                 "Send a photo or description of your meal to keep your nutrition log up to date.\n\n"
                 "Consistent tracking helps you get the best AI insights! 📸🥗"
             )
+            due_user_ids = []
             for user in users:
                 tzname = user.get('timezone')
                 if not tzname:
@@ -69,143 +197,141 @@ class AutomatedSummaryService:
                 user_now = now_utc.astimezone(user_tz)
                 user_time = user_now.time().replace(second=0, microsecond=0)
                 if any(user_time == t for t in reminder_times):
-                    try:
-                        await self.bot.send_message(
-                            chat_id=user['telegram_user_id'],
-                            text=reminder_message,
-                            parse_mode='Markdown'
-                        )
-                        await asyncio.sleep(0.5)
-                    except Exception as e:
-                        logger.error(f"Error sending food reminder to user {user['telegram_user_id']}: {e}")
+                    due_user_ids.append(user['telegram_user_id'])
+
+            async def send_reminder(user_id: int):
+                try:
+                    await self._send_message(user_id, reminder_message)
+                except Exception as e:
+                    logger.error(f"Error sending food reminder to user {user_id}: {e}")
+
+            await self._broadcast(due_user_ids, send_reminder)
         except Exception as e:
             logger.error(f"Error in send_food_reminders_timezone_aware: {e}")
     
     async def send_daily_ai_summaries(self):
         """Send AI-generated daily summaries to all users"""
         try:
-            user_ids = self.database_service.db.get_all_user_ids()
+            user_ids = await self._get_user_ids()
             today = datetime.now().strftime('%Y-%m-%d')
             
             logger.info(f"Generating AI daily summaries for {len(user_ids)} users")
             
-            for user_id in user_ids:
-                try:
-                    # Generate AI summary
-                    ai_summary = await self.ai_summary_service.generate_daily_summary(user_id, today)
-                    
-                    if ai_summary:
-                        message = f"🌙 **AI Daily Nutrition Summary - {today}**\n\n"
-                        message += f"📋 **Summary:**\n{ai_summary.summary}\n\n"
-                        
-                        if ai_summary.key_observations:
-                            message += "🔍 **Key Observations:**\n"
-                            for obs in ai_summary.key_observations:
-                                message += f"• {obs}\n"
-                            message += "\n"
-                        
-                        if ai_summary.nutrition_highlights:
-                            message += "⭐ **Nutrition Highlights:**\n"
-                            for highlight in ai_summary.nutrition_highlights:
-                                message += f"• {highlight}\n"
-                            message += "\n"
-                        
-                        if ai_summary.recommendations:
-                            message += "💡 **Recommendations for Tomorrow:**\n"
-                            for rec in ai_summary.recommendations:
-                                message += f"• {rec}\n"
-                            message += "\n"
-                        
-                        message += f"🌟 **{ai_summary.motivational_message}**"
-                        
-                        await self.bot.send_message(
-                            chat_id=user_id,
-                            text=message,
-                            parse_mode='Markdown'
-                        )
-                        
-                        logger.info(f"Sent AI daily summary to user {user_id}")
-                        
-                        # Small delay to avoid rate limiting
-                        await asyncio.sleep(1)
-                    else:
-                        # Send simple message if no data or AI analysis failed
-                        fallback_msg = "🌙 **Daily Check-in**\n\nNo meals logged today. Don't forget to track your nutrition tomorrow! 📸"
-                        await self.bot.send_message(
-                            chat_id=user_id,
-                            text=fallback_msg,
-                            parse_mode='Markdown'
-                        )
-                        
-                except Exception as e:
-                    logger.error(f"Error sending daily AI summary to user {user_id}: {e}")
-                    continue
+            user_payloads = [(user_id, today, 'en') for user_id in user_ids]
+            
+            # Nightly summaries aren't interactive, so queue them on the cheaper Batch API;
+            # deliver_batched_daily_summaries sends them once the batch completes
+            batch_id = await self.ai_summary_service.submit_daily_summaries_batch(user_payloads)
+            if batch_id:
+                if await asyncio.to_thread(self.database_service.add_pending_daily_batch, batch_id, today, user_ids):
+                    return
+                # A batch that isn't recorded would never be delivered
+                await self.ai_summary_service.cancel_daily_summaries_batch(batch_id)
+            
+            # Fall back to concurrent real-time generation if the batch couldn't be submitted
+            await self._send_daily_summaries(user_ids, today, {})
                     
         except Exception as e:
             logger.error(f"Error in send_daily_ai_summaries: {e}")
     
+    async def deliver_batched_daily_summaries(self):
+        """Send daily summaries from Batch API jobs that have finished or run past the deadline"""
+        batches = await asyncio.to_thread(self.database_service.get_pending_daily_batches)
+        for batch in batches:
+            batch_id = batch['batch_id']
+            summary_date = batch['summary_date']
+            try:
+                if batch['results'] is not None:
+                    # Saved by a run that stopped before sending them
+                    ai_summaries = {
+                        user_id: DailyInsight.model_validate(fields) for user_id, fields in batch['results'].items()
+                    }
+                else:
+                    try:
+                        ai_summaries = await self.ai_summary_service.retrieve_daily_summaries_batch(batch_id)
+                    except Exception as e:
+                        # Treated like a batch still in progress, so a persistent failure still hits the deadline
+                        logger.warning(f"Error checking daily summary batch {batch_id}: {e}")
+                        ai_summaries = None
+                    if ai_summaries is None:
+                        deadline = datetime.combine(date.fromisoformat(summary_date), self.DAILY_BATCH_DEADLINE)
+                        if datetime.now() < deadline:
+                            continue
+                        logger.warning(f"Daily summary batch {batch_id} missed the {self.DAILY_BATCH_DEADLINE:%H:%M} deadline, generating summaries in real time")
+                        await self.ai_summary_service.cancel_daily_summaries_batch(batch_id)
+                        ai_summaries = {}
+                    await asyncio.to_thread(
+                        self.database_service.save_daily_batch_results,
+                        batch_id,
+                        {user_id: insight.model_dump() for user_id, insight in ai_summaries.items()}
+                    )
+                
+                await self._send_daily_summaries(batch['user_ids'], summary_date, ai_summaries)
+                await asyncio.to_thread(self.database_service.delete_daily_batch, batch_id)
+                
+            except Exception as e:
+                logger.error(f"Error delivering daily summary batch {batch_id}: {e}")
+    
+    async def _send_daily_summaries(self, user_ids: List[int], today: str, ai_summaries: Dict[int, DailyInsight]):
+        """Send daily summaries, or a check-in message to users without one
+
+        Users missing from ai_summaries (no batch result, or a result that failed to parse)
+        get a summary generated in real time first, so only users without meals get the check-in.
+        """
+        missing_user_ids = [user_id for user_id in user_ids if user_id not in ai_summaries]
+        if missing_user_ids:
+            ai_summaries = {
+                **ai_summaries,
+                **await self.ai_summary_service.generate_daily_summaries_bulk(
+                    [(user_id, today, 'en') for user_id in missing_user_ids]
+                )
+            }
+        
+        # The date is the same for every user, so the header is built once per broadcast
+        header = f"🌙 **AI Daily Nutrition Summary - {today}**\n\n"
+        
+        async def send_summary(user_id: int):
+            try:
+                ai_summary = ai_summaries.get(user_id)
+                
+                if ai_summary:
+                    await self._send_message(user_id, _render_daily_summary(header, ai_summary))
+                    
+                    logger.info(f"Sent AI daily summary to user {user_id}")
+                else:
+                    # Send simple message if no data or AI analysis failed
+                    fallback_msg = "🌙 **Daily Check-in**\n\nNo meals logged today. Don't forget to track your nutrition tomorrow! 📸"
+                    await self._send_message(user_id, fallback_msg)
+                    
+            except Exception as e:
+                logger.error(f"Error sending daily AI summary to user {user_id}: {e}")
+
+        await self._broadcast(user_ids, send_summary)
+    
     async def send_weekly_ai_summaries(self):
         """Send AI-generated weekly summaries to all users"""
         try:
-            user_ids = self.database_service.db.get_all_user_ids()
+            user_ids = await self._get_user_ids()
             
             logger.info(f"Generating AI weekly summaries for {len(user_ids)} users")
             
-            for user_id in user_ids:
+            # Generate every analysis first (concurrently, capped by the AI service), then broadcast them
+            ai_summaries = await self.ai_summary_service.generate_weekly_summaries_bulk(
+                [(user_id, 'en') for user_id in user_ids]
+            )
+
+            async def send_summary(user_id: int):
                 try:
-                    # Generate AI weekly analysis
-                    ai_summary = await self.ai_summary_service.generate_weekly_summary(user_id)
+                    ai_summary = ai_summaries.get(user_id)
                     
                     if ai_summary:
-                        message = f"📊 **AI Weekly Nutrition Analysis**\n\n"
-                        message += f"📝 **Weekly Summary:**\n{ai_summary.summary}\n\n"
-                        
-                        if ai_summary.trends_analysis:
-                            message += "📈 **Trends Analysis:**\n"
-                            for trend in ai_summary.trends_analysis:
-                                message += f"• {trend}\n"
-                            message += "\n"
-                        
-                        if ai_summary.achievements:
-                            message += "🏆 **This Week's Achievements:**\n"
-                            for achievement in ai_summary.achievements:
-                                message += f"• {achievement}\n"
-                            message += "\n"
-                        
-                        if ai_summary.areas_for_improvement:
-                            message += "🎯 **Areas for Improvement:**\n"
-                            for area in ai_summary.areas_for_improvement:
-                                message += f"• {area}\n"
-                            message += "\n"
-                        
-                        if ai_summary.personalized_recommendations:
-                            message += "💡 **Personalized Recommendations:**\n"
-                            for rec in ai_summary.personalized_recommendations:
-                                message += f"• {rec}\n"
-                            message += "\n"
-                        
-                        if ai_summary.next_week_goals:
-                            message += "🚀 **Goals for Next Week:**\n"
-                            for goal in ai_summary.next_week_goals:
-                                message += f"• {goal}\n"
-                            message += "\n"
-                        
-                        message += "Keep up the fantastic work! 🌟"
-                        
-                        await self.bot.send_message(
-                            chat_id=user_id,
-                            text=message,
-                            parse_mode='Markdown'
-                        )
+                        await self._send_message(user_id, _render_weekly_summary(ai_summary))
                         
                         logger.info(f"Sent AI weekly summary to user {user_id}")
-                        
-                        # Small delay to avoid rate limiting
-                        await asyncio.sleep(1)
-                        
                 except Exception as e:
                     logger.error(f"Error sending weekly AI summary to user {user_id}: {e}")
-                    continue
+
+            await self._broadcast(user_ids, send_summary)
                     
         except Exception as e:
             logger.error(f"Error in send_weekly_ai_summaries: {e}")
@@ -0,0 +1,37 @@
+"""
+Shared pytest setup: makes the bot package importable and provides a test environment
+"""
+import os
+import sys
+
+import pytest
+
+# The bot runs with bot/ as its working directory, so its modules import each other as top-level packages
+BOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bot')
+if BOT_DIR not in sys.path:
+    sys.path.insert(0, BOT_DIR)
+
+# Set up environment
+os.environ.setdefault('OPENAI_API_KEY', 'test-key')
+os.environ.setdefault('ALLOWED_USER_IDS', '123')
+os.environ.setdefault('DATABASE_PATH', 'test.db')
+
+
+# Services are built once per session and shared by every test that asks for them
+
+@pytest.fixture(scope="session")
+def compliment_svc():
+    from services.compliment_service import compliment_service
+    return compliment_service
+
+
+@pytest.fixture(scope="session")
+def language_svc():
+    from services.language_service import language_service
+    return language_service
+
+
+@pytest.fixture(scope="session")
+def clarification_svc(tmp_path_factory):
+    from services.clarification_service import ClarificationService
+    return ClarificationService(str(tmp_path_factory.mktemp('clarifications') / 'pending_clarifications.db'))
@@ -2,46 +2,34 @@
 """
 Test to verify ClarificationService method names
 """
+import logging
 
-import sys
-import os
+logger = logging.getLogger(__name__)
 
-# Add the bot directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'bot'))
-
-def test_clarification_service_methods():
+def test_clarification_service_methods(clarification_svc):
     """Test that we're calling the correct method names"""
-    try:
-        from services.clarification_service import ClarificationService
-        
-        # Create service instance
-        service = ClarificationService()
-        
-        # Check available methods
-        available_methods = [method for method in dir(service) if not method.startswith('_')]
-        
-        print("Available ClarificationService methods:")
-        for method in available_methods:
-            print(f"  - {method}")
-        
-        # Verify the methods we need exist
-        required_methods = ['has_pending_clarification', 'clear_pending_clarification']
-        
-        print(f"\nChecking required methods:")
-        for method in required_methods:
-            if hasattr(service, method):
-                print(f"  ✅ {method} - EXISTS")
-            else:
-                print(f"  ❌ {method} - MISSING")
-        
-        # Check if the wrong method exists
-        if hasattr(service, 'cancel_clarification'):
-            print(f"  ⚠️  cancel_clarification - EXISTS (should use clear_pending_clarification instead)")
+    # Collect the public attributes once; every check below is a set membership test
+    available_methods = {method for method in dir(clarification_svc) if not method.startswith('_')}
+
+    logger.debug("Available ClarificationService methods:")
+    for method in sorted(available_methods):
+        logger.debug(f"  - {method}")
+
+    # Verify the methods we need exist
+    required_methods = {'has_pending_clarification', 'clear_pending_clarification'}
+
+    logger.debug(f"Checking required methods:")
+    for method in sorted(required_methods):
+        if method in available_methods:
+            logger.debug(f"  ✅ {method} - EXISTS")
         else:
-            print(f"  ✅ cancel_clarification - DOES NOT EXIST (good, we should use clear_pending_clarification)")
-            
-    except ImportError as e:
-        print(f"Could not import ClarificationService: {e}")
+            logger.debug(f"  ❌ {method} - MISSING")
+
+    # Check if the wrong method exists
+    if 'cancel_clarification' in available_methods:
+        logger.debug(f"  ⚠️  cancel_clarification - EXISTS (should use clear_pending_clarification instead)")
+    else:
+        logger.debug(f"  ✅ cancel_clarification - DOES NOT EXIST (good, we should use clear_pending_clarification)")
 
-if __name__ == "__main__":
-    test_clarification_service_methods()
+    assert not required_methods - available_methods
+    assert 'cancel_clarification' not in available_methods
@@ -3,16 +3,17 @@
 Test the inline keyboard implementation for clarification requests
 """
 
-import sys
-import os
+import logging
+from functools import lru_cache
 
-# Add the bot directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'bot'))
-
-from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=4)
 def create_clarification_inline_keyboard(language='en'):
     """Create inline keyboard for clarification requests"""
+    # Imported here so collecting this file doesn't load the telegram library
+    from telegram import InlineKeyboardMarkup, InlineKeyboardButton
+    
     if language == 'ru':
         keyboard = [[InlineKeyboardButton("❌ Прервать прояснение", callback_data="abort_clarification")]]
     else:
@@ -22,19 +23,22 @@ def create_clarification_inline_keyboard(language='en'):
 
 def test_inline_keyboard():
     """Test inline keyboard creation"""
-    print("Testing inline keyboard for clarification requests:")
+    logger.debug("Testing inline keyboard for clarification requests:")
     
     # Test English
     en_keyboard = create_clarification_inline_keyboard('en')
-    print(f"English keyboard: {en_keyboard.inline_keyboard[0][0].text}")
-    print(f"Callback data: {en_keyboard.inline_keyboard[0][0].callback_data}")
+    logger.debug(f"English keyboard: {en_keyboard.inline_keyboard[0][0].text}")
+    logger.debug(f"Callback data: {en_keyboard.inline_keyboard[0][0].callback_data}")
     
     # Test Russian
     ru_keyboard = create_clarification_inline_keyboard('ru')
-    print(f"Russian keyboard: {ru_keyboard.inline_keyboard[0][0].text}")
-    print(f"Callback data: {ru_keyboard.inline_keyboard[0][0].callback_data}")
+    logger.debug(f"Russian keyboard: {ru_keyboard.inline_keyboard[0][0].text}")
+    logger.debug(f"Callback data: {ru_keyboard.inline_keyboard[0][0].callback_data}")
     
-    print("\n✅ Inline keyboard implementation looks correct!")
-
-if __name__ == "__main__":
-    test_inline_keyboard()
+    assert en_keyboard.inline_keyboard[0][0].callback_data == "abort_clarification"
+    assert ru_keyboard.inline_keyboard[0][0].callback_data == "abort_clarification"
+    
+    # Markups are immutable and cached per language
+    assert create_clarification_inline_keyboard('en') is en_keyboard
+    
+    logger.debug("✅ Inline keyboard implementation looks correct!")
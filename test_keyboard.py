@@ -3,16 +3,33 @@
 Test script for keyboard functionality in the Telegram bot
 """
 
-import sys
-import os
+import logging
+from functools import lru_cache
 
-# Add the bot directory to the path
-sys.path.append(os.path.join(os.path.dirname(__file__), 'bot'))
+logger = logging.getLogger(__name__)
 
-from telegram import ReplyKeyboardMarkup, KeyboardButton
+EXPECTED_EN_LAYOUT = [
+    ['📊 /daily - Daily Summary', '📈 /weekly - Weekly Summary'],
+    ['🌍 /settimezone - Set Timezone', '🗣️ /setlanguage - Set Language'],
+    ['📋 /status - Check Status', '❌ /cancel - Cancel'],
+    ['🎯 /keyboard - Show Keyboard', '❓ /help - Help'],
+    ['🔄 /start - Start']
+]
 
+EXPECTED_RU_LAYOUT = [
+    ['📊 /daily - Дневная сводка', '📈 /weekly - Недельная сводка'],
+    ['🌍 /settimezone - Часовой пояс', '🗣️ /setlanguage - Язык'],
+    ['📋 /status - Статус', '❌ /cancel - Отмена'],
+    ['🎯 /keyboard - Клавиатура', '❓ /help - Помощь'],
+    ['🔄 /start - Начать']
+]
+
+@lru_cache(maxsize=4)
 def create_commands_keyboard(language='en'):
     """Create a keyboard with all available bot commands"""
+    # Imported here so collecting this file doesn't load the telegram library
+    from telegram import ReplyKeyboardMarkup, KeyboardButton
+    
     if language == 'ru':
         keyboard = [
             [KeyboardButton('📊 /daily - Дневная сводка'), KeyboardButton('📈 /weekly - Недельная сводка')],
@@ -34,25 +51,19 @@ def create_commands_keyboard(language='en'):
 
 def test_keyboard():
     """Test keyboard creation"""
-    print("Testing English keyboard:")
+    logger.debug("Testing English keyboard:")
     en_keyboard = create_commands_keyboard('en')
-    print(f"English keyboard created successfully with {len(en_keyboard.keyboard)} rows")
+    logger.debug(f"English keyboard created successfully with {len(en_keyboard.keyboard)} rows")
     
-    print("\nTesting Russian keyboard:")
+    logger.debug("Testing Russian keyboard:")
     ru_keyboard = create_commands_keyboard('ru')
-    print(f"Russian keyboard created successfully with {len(ru_keyboard.keyboard)} rows")
+    logger.debug(f"Russian keyboard created successfully with {len(ru_keyboard.keyboard)} rows")
     
-    print("\nEnglish keyboard layout:")
-    for i, row in enumerate(en_keyboard.keyboard):
-        print(f"Row {i+1}: {[btn.text for btn in row]}")
+    assert [[btn.text for btn in row] for row in en_keyboard.keyboard] == EXPECTED_EN_LAYOUT
+    assert [[btn.text for btn in row] for row in ru_keyboard.keyboard] == EXPECTED_RU_LAYOUT
+    assert en_keyboard.resize_keyboard
+    assert not en_keyboard.one_time_keyboard
     
-    print("\nRussian keyboard layout:")
-    for i, row in enumerate(ru_keyboard.keyboard):
-        print(f"Row {i+1}: {[btn.text for btn in row]}")
-    
-    print("\nKeyboard properties:")
-    print(f"resize_keyboard: {en_keyboard.resize_keyboard}")
-    print(f"one_time_keyboard: {en_keyboard.one_time_keyboard}")
-
-if __name__ == "__main__":
-    test_keyboard()
+    # Markups are immutable and cached per language
+    assert create_commands_keyboard('en') is en_keyboard
+    assert create_commands_keyboard('ru') is not en_keyboard
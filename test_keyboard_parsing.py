@@ -2,13 +2,22 @@
 """
 Test the keyboard button parsing logic
 """
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Button labels up to the " - " description separator
+BUTTON_PREFIXES = frozenset({
+    '📊 /daily', '📈 /weekly', '🌍 /settimezone', '🗣️ /setlanguage', '📋 /status',
+    '❌ /cancel', '🎯 /keyboard', '❓ /help', '🔄 /start'
+})
 
 def test_keyboard_button_parsing():
     """Test parsing keyboard button text"""
-    
+
     test_cases = [
         "🎯 /keyboard - Show Keyboard",
-        "📊 /daily - Daily Summary", 
+        "📊 /daily - Daily Summary",
         "📈 /weekly - Weekly Summary",
         "🌍 /settimezone - Set Timezone",
         "🗣️ /setlanguage - Set Language",
@@ -17,18 +26,18 @@ def test_keyboard_button_parsing():
         "❓ /help - Help",
         "🔄 /start - Start"
     ]
-    
+
     for test_text in test_cases:
-        print(f"Input: {test_text}")
-        
+        logger.debug(f"Input: {test_text}")
+
         # Extract command like the bot does
-        command_part = test_text.split(' - ')[0]  # Get the part before the description
-        command = command_part.split(' ')[1] if ' ' in command_part else command_part  # Extract /command
-        
-        print(f"  -> Command part: {command_part}")
-        print(f"  -> Extracted command: {command}")
-        print(f"  -> Starts with emoji command: {test_text.startswith(('📊 /daily', '📈 /weekly', '🌍 /settimezone', '🗣️ /setlanguage', '📋 /status', '❌ /cancel', '🎯 /keyboard', '❓ /help', '🔄 /start'))}")
-        print()
-
-if __name__ == "__main__":
-    test_keyboard_button_parsing()
+        command_part = test_text.split(' - ', 1)[0]  # Get the part before the description
+        command = command_part.rpartition(' ')[2]  # Extract /command
+        is_button = command_part in BUTTON_PREFIXES
+
+        logger.debug(f"  -> Command part: {command_part}")
+        logger.debug(f"  -> Extracted command: {command}")
+        logger.debug(f"  -> Starts with emoji command: {is_button}")
+
+        assert is_button
+        assert command.startswith('/')
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Test script for timezone-aware food reminders
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+import pytz
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.sent.append(chat_id)
+
+
+class FakeDatabaseService:
+    def __init__(self, users):
+        self.users = users
+
+    def get_all_users_with_timezones(self):
+        return self.users
+
+
+def frozen_datetime(now_utc):
+    """A datetime class whose now() always returns the given UTC moment"""
+    class FrozenDatetime(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return now_utc.astimezone(tz) if tz else now_utc.replace(tzinfo=None)
+    return FrozenDatetime
+
+
+async def _no_sleep(delay):
+    pass
+
+
+@pytest.mark.parametrize("now_utc,expected", [
+    (datetime(2026, 1, 5, 4, 30, tzinfo=pytz.UTC), [1]),  # 10:00 in Kolkata, on time
+    (datetime(2026, 1, 5, 4, 31, tzinfo=pytz.UTC), [1]),  # Same run, started a minute late
+    (datetime(2026, 1, 5, 4, 45, tzinfo=pytz.UTC), []),  # 10:15 in Kolkata, no reminder due
+])
+def test_food_reminder_for_late_run(monkeypatch, now_utc, expected):
+    """Test that a reminder run starting after its quarter hour still reaches the users due in it"""
+    from services import scheduler_service
+
+    monkeypatch.setattr(scheduler_service, 'datetime', frozen_datetime(now_utc))
+    monkeypatch.setattr(scheduler_service.asyncio, 'sleep', _no_sleep)
+
+    bot = FakeBot()
+    users = [{'telegram_user_id': 1, 'timezone': 'Asia/Kolkata'}, {'telegram_user_id': 2, 'timezone': 'UTC'}]
+    service = scheduler_service.AutomatedSummaryService(bot, FakeDatabaseService(users), None)
+
+    asyncio.run(service.send_food_reminders_timezone_aware())
+
+    assert bot.sent == expected
@@ -2,22 +2,27 @@
 """
 Test the simplified keyboard button mapping
 """
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Matched on the full label, so food text that merely starts with a button's emoji stays food text
+BUTTON_TO_COMMAND = {
+    # English buttons
+    '📊 Daily Summary': 'daily',
+    '📈 Weekly Summary': 'weekly', 
+    '❓ Help': 'help',
+    '❌ Cancel': 'cancel',
+    # Russian buttons
+    '📊 Дневная сводка': 'daily',
+    '📈 Недельная сводка': 'weekly',
+    '❓ Помощь': 'help',
+    '❌ Отмена': 'cancel'
+}
 
 def test_simplified_keyboard_mapping():
     """Test the new button to command mapping"""
     
-    button_to_command = {
-        # English buttons
-        '📊 Daily Summary': 'daily',
-        '📈 Weekly Summary': 'weekly', 
-        '❓ Help': 'help',
-        '❌ Cancel': 'cancel',
-        # Russian buttons
-        '📊 Дневная сводка': 'daily',
-        '📈 Недельная сводка': 'weekly',
-        '❓ Помощь': 'help',
-        '❌ Отмена': 'cancel'
-    }
     
     test_cases = [
         '📊 Daily Summary',
@@ -29,18 +34,17 @@ def test_simplified_keyboard_mapping():
         '❓ Помощь',
         '❌ Отмена',
         'Some regular food text',  # Should not match
-        'Pizza with cheese'        # Should not match
+        'Pizza with cheese',       # Should not match
+        '❓ Is pizza healthy?'      # Should not match: only the emoji is shared with a button
     ]
+    non_buttons = set(test_cases[-3:])
     
     for test_text in test_cases:
-        print(f"Input: '{test_text}'")
+        logger.debug(f"Input: '{test_text}'")
         
-        if test_text in button_to_command:
-            command = button_to_command[test_text]
-            print(f"  ✅ Mapped to command: {command}")
+        command = BUTTON_TO_COMMAND.get(test_text)
+        if command:
+            logger.debug(f"  ✅ Mapped to command: {command}")
         else:
-            print(f"  ❌ Not a keyboard button (will be processed as food text)")
-        print()
-
-if __name__ == "__main__":
-    test_simplified_keyboard_mapping()
+            logger.debug(f"  ❌ Not a keyboard button (will be processed as food text)")
+        assert (command is None) == (test_text in non_buttons)